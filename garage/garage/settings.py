@@ -121,6 +121,20 @@ CHANNEL_LAYERS = {
 }
 
 
+# Cache Configuration (Redis, shared by Daphne and the Celery workers)
+# Cached data is invalidated from signals that often fire in the worker (e.g.
+# when parse_ibt_file saves a session), so a per-process LocMemCache would
+# leave the web process serving stale entries. Uses its own Redis database
+# because cache.clear() flushes the whole database. `manage.py test` and
+# pytest default to garage.settings_test, which swaps in a LocMemCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_URL', default='redis://localhost:6379/1'),
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -0,0 +1,14 @@
+"""
+Django settings for running the test suite.
+
+Same as settings.py, but with a per-process LocMemCache so the tests don't
+need a live Redis, and cache.clear() in test setUp can't flush a real cache.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
@@ -6,6 +6,10 @@ import sys
 
 def main():
     """Run administrative tasks."""
+    # Tests default to settings_test (LocMemCache), so cache.clear() in test
+    # setUp never flushes the shared Redis cache
+    if sys.argv[1:2] == ['test']:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'garage.settings_test')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'garage.settings')
     try:
         from django.core.management import execute_from_command_line
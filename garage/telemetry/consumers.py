@@ -12,6 +12,7 @@ from django.core.cache import cache
 
 from .services.live_telemetry import LiveTelemetrySession, get_session_metadata_from_iracing
 from .models import Session
+from .utils.api_tokens import get_user_for_api_token
 
 logger = logging.getLogger(__name__)
 
@@ -271,13 +272,8 @@ class LiveTelemetryConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def _get_driver_by_token(self, api_token):
-        """Get driver from database by API token."""
-        from .models import Driver
-        try:
-            driver_profile = Driver.objects.select_related('user').get(api_token=api_token)
-            return driver_profile.user
-        except Driver.DoesNotExist:
-            return None
+        """Get driver's user by API token (None if the token is unknown or malformed)."""
+        return get_user_for_api_token(api_token)
 
     @database_sync_to_async
     def _create_live_session(self, driver, session_info):
@@ -68,11 +68,8 @@ class Command(BaseCommand):
                     continue
 
                 # Calculate hash
-                hash_obj = hashlib.sha256()
                 with open(file_path, 'rb') as f:
-                    for chunk in iter(lambda: f.read(8192), b''):
-                        hash_obj.update(chunk)
-                file_hash = hash_obj.hexdigest()
+                    file_hash = hashlib.file_digest(f, 'sha256').hexdigest()
 
                 if dry_run:
                     self.stdout.write(
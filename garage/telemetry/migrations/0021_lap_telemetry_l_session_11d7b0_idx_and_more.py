@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0020_populate_display_names"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lap",
+            index=models.Index(
+                fields=["session", "is_valid", "lap_time"],
+                name="telemetry_l_session_11d7b0_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["driver", "-session_date"],
+                name="telemetry_s_driver__e6a0fc_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0021_lap_telemetry_l_session_11d7b0_idx_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="driver",
+            name="api_token",
+            field=models.CharField(
+                blank=True,
+                help_text="API token for telemetry client authentication",
+                max_length=64,
+                null=True,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="driver",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("api_token__isnull", False)),
+                fields=("api_token",),
+                name="driver_api_token_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0022_alter_driver_api_token_driver_driver_api_token_uniq"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["driver", "processing_status"],
+                name="telemetry_s_driver__058ac9_idx",
+            ),
+        ),
+    ]
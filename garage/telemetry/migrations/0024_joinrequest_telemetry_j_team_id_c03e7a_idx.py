@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0023_session_telemetry_s_driver__058ac9_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="joinrequest",
+            name="telemetry_j_team_id_7334dd_idx",
+        ),
+        migrations.AddIndex(
+            model_name="joinrequest",
+            index=models.Index(
+                fields=["team", "status", "-reviewed_at"],
+                name="telemetry_j_team_id_c03e7a_idx",
+            ),
+        ),
+    ]
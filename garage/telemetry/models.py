@@ -10,6 +10,7 @@ from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+import numpy as np
 import uuid
 
 
@@ -26,7 +27,6 @@ class Driver(models.Model):
     api_token = models.CharField(
         max_length=64,
         blank=True,
-        unique=True,
         null=True,
         help_text="API token for telemetry client authentication"
     )
@@ -49,7 +49,14 @@ class Driver(models.Model):
         ordering = ['user__username']
         indexes = [
             models.Index(fields=['iracing_id']),  # Frequently queried for driver lookups
-            # Note: api_token already has index via unique=True constraint
+        ]
+        constraints = [
+            # Unique index for API token auth; partial so drivers without a token aren't indexed
+            models.UniqueConstraint(
+                fields=['api_token'],
+                condition=models.Q(api_token__isnull=False),
+                name='driver_api_token_uniq'
+            )
         ]
 
     def __str__(self):
@@ -58,8 +65,12 @@ class Driver(models.Model):
     def generate_api_token(self):
         """Generate a new API token for this driver."""
         import secrets
+        from .utils.api_tokens import invalidate_api_token
+        old_token = self.api_token
         self.api_token = secrets.token_urlsafe(48)
         self.save(update_fields=['api_token'])
+        # Stop accepting the old token right away rather than once its cache entry expires
+        invalidate_api_token(old_token)
         return self.api_token
 
 
@@ -120,16 +131,13 @@ class Team(models.Model):
 
     def is_user_member(self, user):
         """Check if a user is a member of this team."""
-        if not user.is_authenticated:
-            return False
-        return self.members.filter(pk=user.pk).exists()
+        return self.get_user_role(user) is not None
 
     def get_user_role(self, user):
         """Get user's role in this team, or None if not a member."""
         if not user.is_authenticated:
             return None
-        membership = TeamMembership.objects.filter(team=self, user=user).first()
-        return membership.role if membership else None
+        return TeamMembership.objects.filter(team=self, user=user).values_list('role', flat=True).first()
 
     def is_user_admin(self, user):
         """Check if user has admin privileges (owner or admin role)."""
@@ -147,22 +155,15 @@ class Team(models.Model):
         if not self.allow_join_requests:
             return False
         # Check if user already has a pending request
-        if hasattr(self, 'join_requests'):  # Will be available after JoinRequest model is created
-            from telemetry.models import JoinRequest  # Import here to avoid circular import
-            if JoinRequest.objects.filter(team=self, user=user, status='pending').exists():
-                return False
+        if self.has_pending_request(user):
+            return False
         return True
 
     def has_pending_request(self, user):
         """Check if user has a pending join request for this team."""
         if not user.is_authenticated:
             return False
-        try:
-            from telemetry.models import JoinRequest
-            return JoinRequest.objects.filter(team=self, user=user, status='pending').exists()
-        except (ImportError, AttributeError):
-            # JoinRequest model doesn't exist yet
-            return False
+        return JoinRequest.objects.filter(team=self, user=user, status='pending').exists()
 
 
 class TeamMembership(models.Model):
@@ -226,7 +227,7 @@ class JoinRequest(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['team', 'status']),  # For filtering pending requests
+            models.Index(fields=['team', 'status', '-reviewed_at']),  # Pending/recently reviewed requests per team
             models.Index(fields=['user', 'status']),  # For user's request history
         ]
         # Constraint: one pending request per user per team
@@ -510,6 +511,8 @@ class Session(models.Model):
             models.Index(fields=['driver', 'track', 'car']),
             models.Index(fields=['processing_status']),
             models.Index(fields=['-session_date']),
+            models.Index(fields=['driver', '-session_date']),  # User's sessions, newest first
+            models.Index(fields=['driver', 'processing_status']),  # Per-user processing counts
             models.Index(fields=['is_live', '-last_telemetry_update']),
             models.Index(fields=['driver', 'file_hash']),  # Fast duplicate detection
         ]
@@ -546,6 +549,7 @@ class Lap(models.Model):
         unique_together = ['session', 'lap_number']
         indexes = [
             models.Index(fields=['session', 'lap_time']),
+            models.Index(fields=['session', 'is_valid', 'lap_time']),  # Best valid lap per session
             models.Index(fields=['is_valid', 'lap_time']),
             models.Index(fields=['is_personal_best']),  # For querying personal best laps
             models.Index(fields=['is_valid', 'is_personal_best', 'lap_time']),  # Compound index for PB queries
@@ -597,5 +601,18 @@ class TelemetryData(models.Model):
     def __str__(self):
         return f"Telemetry for {self.lap}"
 
+    def channel_array(self, name, dtype=np.float32):
+        """
+        Get a telemetry channel as a NumPy array, converted once per instance.
+
+        Missing samples (None) become NaN. Returns an empty array if the
+        channel is not present.
+        """
+        cache = self.__dict__.setdefault('_channel_arrays', {})
+        key = (name, np.dtype(dtype))
+        if key not in cache:
+            cache[key] = np.asarray(self.data.get(name, []), dtype=dtype)
+        return cache[key]
+
 
 
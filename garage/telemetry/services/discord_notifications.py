@@ -295,3 +295,101 @@ def send_team_record_notification(session, lap, previous_time=None, previous_hol
     except Exception as e:
         logger.error(f"Error sending team record Discord notification: {e}", exc_info=True)
         return False
+
+
+def build_lap_share_message(lap, notes=''):
+    """
+    Build the Discord message text for a lap shared to a team.
+
+    Args:
+        lap: Lap object (with session, track, car and driver loaded)
+        notes: Optional notes from the sharing driver
+
+    Returns:
+        str: Markdown message for the webhook 'content' field
+    """
+    # Get driver display name from iRacing (not website username)
+    driver_name = lap.session.driver_name or lap.session.driver.username
+
+    track_display = lap.session.track.name if lap.session.track else 'Unknown Track'
+    if lap.session.track and lap.session.track.configuration:
+        track_display += f" - {lap.session.track.configuration}"
+
+    car_display = lap.session.car.name if lap.session.car else 'Unknown Car'
+    lap_status = "Valid" if lap.is_valid else "Invalid"
+    session_date = lap.session.session_date.strftime("%b %d, %Y %H:%M")
+
+    weather_info = ""
+    if lap.session.air_temp:
+        weather_info = f"\n**Weather:** {lap.session.weather_type or 'Clear'}, {lap.session.air_temp}°C"
+
+    notes_section = ""
+    if notes:
+        notes_section = f"\n\n**Notes:**\n> {notes}\n"
+
+    # Format lap time as mm:ss.mmm
+    total_seconds = float(lap.lap_time)
+    minutes = int(total_seconds // 60)
+    seconds = total_seconds % 60
+    if minutes > 0:
+        formatted_time = f"{minutes}:{seconds:06.3f}"
+    else:
+        formatted_time = f"{seconds:.3f}s"
+
+    return f"""**New Lap Shared to Team**
+━━━━━━━━━━━━━━━━━━━━━
+**Driver:** {driver_name}
+**Track:** {track_display}
+**Car:** {car_display}
+**Time:** {formatted_time} ({lap_status})
+**Date:** {session_date}{weather_info}{notes_section}
+
+Download the .lap.gz attachment below to import
+"""
+
+
+def send_lap_share(lap, team, notes=''):
+    """
+    Post a lap to a team's Discord webhook with its .lap.gz export attached.
+
+    Args:
+        lap: Lap object with telemetry (session, track, car and driver loaded)
+        team: Team whose webhook receives the lap
+        notes: Optional notes from the sharing driver
+
+    Returns:
+        bool: True if Discord accepted the message, False otherwise
+
+    Raises:
+        requests.RequestException: On connection errors and 429/5xx responses,
+            so callers can retry
+    """
+    from telemetry.utils.export import build_lap_export_data, compress_lap_export_data
+
+    compressed_data = compress_lap_export_data(build_lap_export_data(lap, lap.telemetry))
+
+    track_name = (lap.session.track.name if lap.session.track else 'Unknown').replace(' ', '_')
+    car_name = (lap.session.car.name if lap.session.car else 'Unknown').replace(' ', '_')
+    lap_time_str = f"{lap.lap_time:.3f}".replace('.', '_')
+    filename = f"{track_name}_{car_name}_{lap_time_str}.lap.gz"
+
+    response = requests.post(
+        team.discord_webhook_url,
+        data={'content': build_lap_share_message(lap, notes)},
+        files={'file': (filename, compressed_data, 'application/gzip')},
+        timeout=10
+    )
+
+    if response.status_code in [200, 204]:
+        logger.info(f"Lap {lap.id} shared to Discord for team {team.name}")
+        return True
+
+    if response.status_code == 429 or response.status_code >= 500:
+        # Transient Discord failure - let the caller retry
+        response.raise_for_status()
+
+    logger.error(
+        f"Discord webhook returned status {response.status_code} "
+        f"for lap share: {response.text}"
+    )
+    return False
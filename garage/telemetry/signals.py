@@ -4,10 +4,13 @@ Signals for telemetry app.
 Handles automatic actions on model events like user creation.
 """
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Driver, Team, TeamMembership
+from .models import Driver, Team, TeamMembership, Session, Lap
+from .utils.api_tokens import invalidate_api_token
+from .utils.filter_options import invalidate_leaderboard_filter_options, invalidate_user_filter_options
 
 
 @receiver(post_save, sender=User)
@@ -33,3 +36,70 @@ def create_driver_profile(sender, instance, created, **kwargs):
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Failed to add user {instance.username} to default team: {e}")
+
+
+@receiver(post_delete, sender=Driver)
+def invalidate_deleted_driver_api_token(sender, instance, **kwargs):
+    """
+    Stop accepting a deleted driver's API token (also runs when the user is deleted).
+    """
+    invalidate_api_token(instance.api_token)
+
+
+# Session fields that decide which tracks/cars appear in a user's filter options
+USER_FILTER_FIELDS = frozenset({'track', 'car', 'driver'})
+
+# Session fields that can change which tracks/cars appear in the leaderboard filters
+LEADERBOARD_FILTER_FIELDS = frozenset({'track', 'car'})
+
+
+def _session_filter_fields_changed(created, update_fields, fields):
+    """
+    Whether a Session save can have changed any of the given filter fields.
+
+    Saves with explicit update_fields (e.g. the per-frame last_telemetry_update
+    save during live telemetry) are skipped unless they touch one of them.
+    Deletes pass neither argument, so they always count as a change.
+    """
+    return created or update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Session)
+def remember_previous_session_driver(sender, instance, update_fields=None, **kwargs):
+    """
+    Note who owned an existing session before a save that can reassign it.
+
+    The post_save receiver below clears that driver's filter options too.
+    """
+    if instance._state.adding or (update_fields is not None and 'driver' not in update_fields):
+        return
+    instance._previous_driver_id = (
+        Session.objects.filter(pk=instance.pk).values_list('driver_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+def invalidate_session_filter_options(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Clear the cached track/car filter options when a session changes.
+
+    Runs after commit so a concurrent request can't re-cache the old options.
+    """
+    if _session_filter_fields_changed(created, update_fields, USER_FILTER_FIELDS):
+        driver_ids = {instance.driver_id, getattr(instance, '_previous_driver_id', None)} - {None}
+        for driver_id in driver_ids:
+            transaction.on_commit(lambda driver_id=driver_id: invalidate_user_filter_options(driver_id))
+
+    if _session_filter_fields_changed(created, update_fields, LEADERBOARD_FILTER_FIELDS):
+        transaction.on_commit(invalidate_leaderboard_filter_options)
+
+
+@receiver(post_delete, sender=Lap)
+def invalidate_deleted_lap_filter_options(sender, instance, **kwargs):
+    """
+    Clear the cached leaderboard filter options when a lap is deleted.
+
+    A deleted lap may have been the last one on its track or car.
+    """
+    transaction.on_commit(invalidate_leaderboard_filter_options)
@@ -4,6 +4,7 @@ Celery tasks for processing telemetry data.
 
 import os
 from datetime import timedelta
+import requests
 from celery import shared_task
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
@@ -675,3 +676,45 @@ def cleanup_old_ibt_files():
         'freed_mb': round(freed_mb, 2),
         'errors': len(errors)
     }
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    max_retries=3
+)
+def share_lap_to_discord(self, lap_id, team_id, notes=''):
+    """
+    Compress a lap export and post it to a team's Discord webhook.
+
+    Runs in the background so the web worker isn't held while the export is
+    gzipped and Discord responds. Connection errors and 429/5xx responses
+    are retried with exponential backoff.
+
+    Args:
+        lap_id: Primary key of the Lap to share
+        team_id: Primary key of the Team whose webhook to post to
+        notes: Optional notes from the sharing driver
+    """
+    from .models import Lap, Team
+    from .services.discord_notifications import send_lap_share
+
+    try:
+        # The lap's telemetry can disappear between queueing and running
+        # (e.g. the session was reprocessed), and the export needs it
+        lap = Lap.objects.select_related(
+            'session', 'session__track', 'session__car', 'session__driver', 'telemetry'
+        ).get(pk=lap_id, telemetry__isnull=False)
+        team = Team.objects.get(pk=team_id)
+    except ObjectDoesNotExist:
+        logger.warning(
+            "Lap %s (with telemetry) or team %s no longer exists, skipping Discord share", lap_id, team_id
+        )
+        return False
+
+    if not team.discord_webhook_url:
+        logger.warning("Team %s has no Discord webhook, skipping share of lap %s", team_id, lap_id)
+        return False
+
+    return send_lap_share(lap, team, notes)
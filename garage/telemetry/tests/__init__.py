@@ -12,3 +12,4 @@ Test modules:
 from .test_models import *
 from .test_views import *
 from .test_api import *
+from .test_utils import *
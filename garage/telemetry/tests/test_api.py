@@ -3,14 +3,20 @@ API endpoint tests for the Ridgway Garage telemetry app.
 """
 
 import gzip
+import hashlib
 import json
+from unittest import mock
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from telemetry.models import Session, Lap, TelemetryData, Track, Car, Team, Driver
+from telemetry.views.api import telemetry as chart_views
 
 User = get_user_model()
 
@@ -41,6 +47,16 @@ class APIAuthTest(TestCase):
         self.assertTrue(data['authenticated'])
         self.assertEqual(data['username'], 'testdriver')
 
+    def test_api_auth_test_queries(self):
+        """Test that auth test costs one token lookup and one session count."""
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('telemetry:api_auth_test'),
+                HTTP_AUTHORIZATION=f'Token {self.api_token}'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['sessions_count'], 0)
+
     def test_api_auth_test_without_token(self):
         """Test authentication endpoint without token."""
         response = self.client.get(reverse('telemetry:api_auth_test'))
@@ -54,6 +70,16 @@ class APIAuthTest(TestCase):
         )
         self.assertEqual(response.status_code, 401)
 
+    def test_api_auth_test_rejects_bad_token_format_without_query(self):
+        """Test that tokens with invalid characters are rejected before the DB lookup."""
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('telemetry:api_auth_test'),
+                HTTP_AUTHORIZATION='Token ' + '!' * 40
+            )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['error'], 'Invalid token format')
+
     def test_api_auth_test_with_malformed_header(self):
         """Test authentication endpoint with malformed header."""
         response = self.client.get(
@@ -101,6 +127,8 @@ class APIUploadTest(TestCase):
         session = Session.objects.get(id=data['session_id'])
         self.assertEqual(session.driver, self.user)
         self.assertEqual(session.processing_status, 'pending')
+        with session.ibt_file.open('rb') as stored:
+            self.assertEqual(stored.read(), ibt_data)
 
     def test_api_upload_compressed_ibt(self):
         """Test uploading gzip-compressed IBT file."""
@@ -127,6 +155,7 @@ class APIUploadTest(TestCase):
         with session.ibt_file.open('rb') as f:
             saved_data = f.read()
         self.assertEqual(saved_data, original_data)  # Should be decompressed
+        self.assertEqual(session.file_hash, hashlib.sha256(original_data).hexdigest())
 
     def test_api_upload_corrupted_gzip(self):
         """Test that corrupted gzip files are rejected."""
@@ -148,6 +177,25 @@ class APIUploadTest(TestCase):
         data = response.json()
         self.assertIn('error', data)
 
+    def test_api_upload_truncated_gzip(self):
+        """Test that a gzip stream cut off mid-file is rejected."""
+        truncated_data = gzip.compress(b"fake ibt content here" * 100)[:-12]
+
+        test_file = SimpleUploadedFile(
+            "truncated.ibt.gz",
+            truncated_data,
+            content_type="application/octet-stream"
+        )
+
+        response = self.client.post(
+            reverse('telemetry:api_upload'),
+            {'file': test_file},
+            HTTP_AUTHORIZATION=f'Token {self.api_token}'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Session.objects.filter(driver=self.user).exists())
+
     def test_api_upload_duplicate_detection(self):
         """Test that duplicate uploads are detected."""
         ibt_data = b"unique ibt content" * 100
@@ -199,6 +247,43 @@ class APIUploadTest(TestCase):
         )
         self.assertEqual(response.status_code, 401)
 
+    @override_settings(MAX_UPLOAD_SIZE=2048)
+    def test_api_upload_rejects_oversize_content_length(self):
+        """Test that requests over MAX_UPLOAD_SIZE are rejected from the header with 413."""
+        test_file = SimpleUploadedFile(
+            "test_session.ibt",
+            b"x" * 4096,
+            content_type="application/octet-stream"
+        )
+
+        response = self.client.post(
+            reverse('telemetry:api_upload'),
+            {'file': test_file},
+            HTTP_AUTHORIZATION=f'Token {self.api_token}'
+        )
+
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Session.objects.filter(driver=self.user).exists())
+
+    @override_settings(MAX_UPLOAD_SIZE=64 * 1024)
+    def test_api_upload_rejects_gzip_that_decompresses_past_limit(self):
+        """Test that decompression stops with 413 once the output passes MAX_UPLOAD_SIZE."""
+        test_file = SimpleUploadedFile(
+            "bomb.ibt.gz",
+            gzip.compress(b"\0" * (2 * 1024 * 1024)),
+            content_type="application/octet-stream"
+        )
+
+        response = self.client.post(
+            reverse('telemetry:api_upload'),
+            {'file': test_file},
+            HTTP_AUTHORIZATION=f'Token {self.api_token}'
+        )
+
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('exceeds maximum allowed size', response.json()['error'])
+        self.assertFalse(Session.objects.filter(driver=self.user).exists())
+
     def test_api_upload_rejects_invalid_extension(self):
         """Test that non-IBT files are rejected."""
         test_file = SimpleUploadedFile(
@@ -278,6 +363,93 @@ class APILapTelemetryTest(TestCase):
         self.assertIn('telemetry', data)
         self.assertIn('Speed', data['telemetry'])
 
+    def test_api_lap_telemetry_max_points(self):
+        """Test that max_points thins every channel with the same sample indices."""
+        self.telemetry.data = {
+            'LapDist': list(range(100)),
+            'Speed': [v * 2 for v in range(100)],
+            'TrackName': 'Test Track',
+        }
+        self.telemetry.save()
+
+        response = self.client.get(
+            reverse('telemetry:api_lap_telemetry', args=[self.lap.id]),
+            {'max_points': 10}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        telemetry = response.json()['telemetry']
+        self.assertEqual(len(telemetry['LapDist']), 10)
+        self.assertEqual(telemetry['LapDist'][0], 0)
+        self.assertEqual(telemetry['LapDist'][-1], 99)
+        self.assertEqual(telemetry['Speed'], [v * 2 for v in telemetry['LapDist']])
+        self.assertEqual(telemetry['TrackName'], 'Test Track')
+
+    def test_api_lap_telemetry_queries(self):
+        """Test that the lap and its related rows load in one query, plus the blob."""
+        url = reverse('telemetry:api_lap_telemetry', args=[self.lap.id])
+
+        # Session + user lookup, the lap with session/driver/track/car/telemetry,
+        # the deferred telemetry data, and the session save (savepoint, update, release)
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_lap_telemetry_not_modified(self):
+        """Test that a matching If-None-Match gets a 304 without the telemetry body."""
+        url = reverse('telemetry:api_lap_telemetry', args=[self.lap.id])
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_api_lap_telemetry_etag_changes_with_telemetry(self):
+        """Test that replacing a lap's telemetry invalidates its ETag."""
+        url = reverse('telemetry:api_lap_telemetry', args=[self.lap.id])
+        etag = self.client.get(url)['ETag']
+        self.telemetry.delete()
+        TelemetryData.objects.create(lap=self.lap, data={'Speed': [1, 2]}, sample_count=2)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['telemetry']['Speed'], [1, 2])
+
+    def test_api_lap_telemetry_etag_changes_with_track_name(self):
+        """Test that renaming the lap's track invalidates its ETag."""
+        url = reverse('telemetry:api_lap_telemetry', args=[self.lap.id])
+        etag = self.client.get(url)['ETag']
+        self.track.name = "Renamed Track"
+        self.track.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lap']['track'], "Renamed Track")
+
+    def test_api_lap_telemetry_etag_changes_with_lap_and_driver(self):
+        """Test that editing the lap or renaming its driver invalidates the ETag."""
+        url = reverse('telemetry:api_lap_telemetry', args=[self.lap.id])
+        etag = self.client.get(url)['ETag']
+        self.lap.lap_time = 88.123
+        self.lap.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lap']['lap_time'], '88.1230')
+
+        etag = response['ETag']
+        self.user.username = "renameddriver"
+        self.user.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lap']['driver'], "renameddriver")
+
     def test_api_lap_telemetry_requires_login(self):
         """Test that lap telemetry requires authentication."""
         self.client.logout()
@@ -372,6 +544,7 @@ class APIGenerateChartTest(TestCase):
     """Test API chart generation endpoint."""
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(username="testdriver", password="testpass123")
         self.client.login(username="testdriver", password="testpass123")
@@ -422,6 +595,102 @@ class APIGenerateChartTest(TestCase):
         self.assertTrue(data['success'])
         self.assertIn('chart_json', data)
 
+    def test_api_generate_chart_time_delta(self):
+        """Test that comparing laps adds a time delta trace against the fastest lap."""
+        self.telemetry.data['SessionTime'] = [1000.0, 1001.0, 1002.0]
+        self.telemetry.save()
+        slower_lap = Lap.objects.create(
+            session=self.session,
+            lap_number=2,
+            lap_time=100.5,
+            is_valid=True
+        )
+        TelemetryData.objects.create(
+            lap=slower_lap,
+            data={
+                'Speed': [100, 105, 110],
+                'LapDist': [0, 100, 200],
+                'SessionTime': [1100.0, 1101.0, 1102.5],
+            },
+            sample_count=3
+        )
+
+        response = self.client.post(
+            reverse('telemetry:api_generate_chart'),
+            json.dumps({
+                'lap_ids': [self.lap.id, slower_lap.id],
+                'channels': ['Speed']
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['subplot_count'], 2)
+        traces = json.loads(data['chart_json'])['data']
+        fastest_delta, slower_delta = traces[0]['y'], traces[1]['y']
+        self.assertAlmostEqual(max(abs(v) for v in fastest_delta), 0.0)
+        self.assertAlmostEqual(slower_delta[-1], 0.5)
+
+    def test_api_generate_chart_is_cached(self):
+        """Test that a repeated request is served from the chart cache without loading telemetry."""
+        body = json.dumps({'lap_ids': [self.lap.id], 'channels': ['Speed']})
+        with mock.patch(
+            'telemetry.views.api.telemetry._build_chart', wraps=chart_views._build_chart
+        ) as build_chart:
+            first = self.client.post(
+                reverse('telemetry:api_generate_chart'), body, content_type='application/json'
+            )
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.post(
+                    reverse('telemetry:api_generate_chart'), body, content_type='application/json'
+                )
+
+        self.assertEqual(build_chart.call_count, 1)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['chart_json'], first.json()['chart_json'])
+        self.assertFalse(any('"telemetry_telemetrydata"."data"' in q['sql'] for q in queries))
+
+    def test_api_generate_chart_cache_follows_trace_names(self):
+        """Test that renaming the driver or changing the lap time rebuilds the cached chart."""
+        body = json.dumps({'lap_ids': [self.lap.id], 'channels': ['Speed']})
+        self.client.post(reverse('telemetry:api_generate_chart'), body, content_type='application/json')
+
+        self.user.username = 'renameddriver'
+        self.user.save()
+        Lap.objects.filter(pk=self.lap.pk).update(lap_time=91.5)
+        response = self.client.post(
+            reverse('telemetry:api_generate_chart'), body, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        trace_names = [trace.get('name') for trace in json.loads(response.json()['chart_json'])['data']]
+        self.assertIn('renameddriver - 91.500s', trace_names)
+
+    def test_api_generate_chart_skips_unknown_laps(self):
+        """Test that unknown lap ids are ignored while the rest are charted."""
+        response = self.client.post(
+            reverse('telemetry:api_generate_chart'),
+            json.dumps({
+                'lap_ids': [self.lap.id + 1000, self.lap.id],
+                'channels': ['Speed']
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lap_count'], 1)
+
+    def test_api_generate_chart_requires_login(self):
+        """Test that chart generation requires authentication."""
+        self.client.logout()
+        response = self.client.post(
+            reverse('telemetry:api_generate_chart'),
+            json.dumps({'lap_ids': [self.lap.id], 'channels': ['Speed']}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 302)  # Redirect to login
+
     def test_api_generate_chart_requires_laps(self):
         """Test that lap_ids are required."""
         response = self.client.post(
@@ -454,6 +723,7 @@ class APITeammateLapAccessTest(TestCase):
     """Test teammate lap access permissions - the main bug we're investigating."""
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
 
         # Create two users who will be teammates
@@ -532,6 +802,19 @@ class APITeammateLapAccessTest(TestCase):
         self.assertEqual(response.status_code, 403,
             "Non-teammate should be denied access")
 
+    def test_stranger_etag_does_not_bypass_permissions(self):
+        """
+        Replaying a teammate's ETag must still be refused for a stranger.
+        """
+        url = reverse('telemetry:api_lap_telemetry', args=[self.user2_lap.id])
+        self.client.login(username="driver1", password="testpass123")
+        etag = self.client.get(url)['ETag']
+
+        self.client.login(username="stranger", password="testpass123")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 403)
+
     def test_owner_can_access_own_lap(self):
         """User2 should always be able to access their own lap."""
         self.client.login(username="driver2", password="testpass123")
@@ -564,6 +847,37 @@ class APITeammateLapAccessTest(TestCase):
         data = response.json()
         self.assertTrue(data['success'])
 
+    def test_generate_chart_filters_mixed_drivers(self):
+        """
+        A chart mixing teammate and stranger laps should only include the teammate's.
+        """
+        stranger_session = Session.objects.create(
+            driver=self.stranger,
+            track=self.track,
+            car=self.car,
+            ibt_file=SimpleUploadedFile("stranger.ibt", b"fake", content_type="application/octet-stream"),
+            processing_status="completed"
+        )
+        stranger_lap = Lap.objects.create(session=stranger_session, lap_number=1, lap_time=95.0, is_valid=True)
+        TelemetryData.objects.create(
+            lap=stranger_lap,
+            data={'Speed': [100, 110, 120], 'LapDist': [0, 100, 200]},
+            sample_count=3
+        )
+        self.client.login(username="driver1", password="testpass123")
+
+        response = self.client.post(
+            reverse('telemetry:api_generate_chart'),
+            json.dumps({
+                'lap_ids': [stranger_lap.id, self.user2_lap.id],
+                'channels': ['Speed']
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lap_count'], 1)
+
     def test_stranger_cannot_generate_chart_with_others_lap(self):
         """
         Stranger should NOT be able to generate a chart with User2's lap.
@@ -583,6 +897,24 @@ class APITeammateLapAccessTest(TestCase):
         self.assertEqual(response.status_code, 404,
             "Non-teammate's lap should be filtered out")
 
+    def test_cached_chart_not_served_to_stranger(self):
+        """
+        A chart cached for a teammate must not be returned to a stranger.
+        """
+        body = json.dumps({'lap_ids': [self.user2_lap.id], 'channels': ['Speed']})
+        self.client.login(username="driver1", password="testpass123")
+        response = self.client.post(
+            reverse('telemetry:api_generate_chart'), body, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.client.login(username="stranger", password="testpass123")
+        response = self.client.post(
+            reverse('telemetry:api_generate_chart'), body, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 404)
+
     def test_api_fastest_laps_shows_teammate_laps(self):
         """
         api_fastest_laps should show User2's lap when User1 requests it,
@@ -604,6 +936,23 @@ class APITeammateLapAccessTest(TestCase):
         self.assertIn(self.user2_lap.id, teammate_lap_ids,
             "Teammate's lap should appear in teammate_laps list")
 
+    def test_api_fastest_laps_query_count(self):
+        """
+        api_fastest_laps should not load deferred fields lap by lap.
+        """
+        Lap.objects.create(session=self.user2_session, lap_number=2, lap_time=99.0, is_valid=True)
+        Lap.objects.create(session=self.user2_session, lap_number=3, lap_time=101.0, is_valid=True)
+        self.client.login(username="driver1", password="testpass123")
+        url = reverse('telemetry:api_fastest_laps')
+
+        # Session + user lookup, the user's laps, the teammates' best laps,
+        # and the session save (savepoint, update, release)
+        with self.assertNumQueries(7):
+            response = self.client.get(url, {'track_id': self.track.id, 'car_id': self.car.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['teammate_laps'][0]['lap_time'], '99.0000')
+
     def test_api_fastest_laps_excludes_stranger_laps(self):
         """
         api_fastest_laps should NOT show stranger's laps.
@@ -638,6 +987,47 @@ class APITeammateLapAccessTest(TestCase):
         self.assertNotIn(stranger_lap.id, teammate_lap_ids,
             "Stranger's lap should NOT appear in teammate_laps")
 
+    def test_api_fastest_laps_returns_best_lap_per_teammate(self):
+        """
+        api_fastest_laps should return exactly one (the fastest) lap per teammate.
+        """
+        faster_lap = Lap.objects.create(
+            session=self.user2_session,
+            lap_number=2,
+            lap_time=98.5,
+            is_valid=True
+        )
+        user3 = User.objects.create_user(username="driver3", password="testpass123")
+        self.team.members.add(user3)
+        user3_session = Session.objects.create(
+            driver=user3,
+            track=self.track,
+            car=self.car,
+            ibt_file=SimpleUploadedFile("user3.ibt", b"fake", content_type="application/octet-stream"),
+            processing_status="completed"
+        )
+        user3_lap = Lap.objects.create(
+            session=user3_session,
+            lap_number=1,
+            lap_time=99.0,
+            is_valid=True
+        )
+
+        self.client.login(username="driver1", password="testpass123")
+
+        response = self.client.get(
+            reverse('telemetry:api_fastest_laps'),
+            {'track_id': self.track.id, 'car_id': self.car.id}
+        )
+
+        data = response.json()
+        teammate_lap_ids = [lap['id'] for lap in data['teammate_laps']]
+        self.assertEqual(teammate_lap_ids, [faster_lap.id, user3_lap.id])
+        self.assertEqual(
+            [lap['driver'] for lap in data['teammate_laps']],
+            ['driver2', 'driver3']
+        )
+
     def test_debug_team_membership(self):
         """Debug test to verify team membership is set up correctly."""
         # Verify team exists
@@ -2,11 +2,13 @@
 Model tests for the Ridgway Garage telemetry app.
 """
 
+import numpy as np
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from telemetry.models import Session, Lap, TelemetryData, Track, Car, Team, Driver
+from telemetry.models import Session, Lap, TelemetryData, Track, Car, Team, TeamMembership, Driver
 
 User = get_user_model()
 
@@ -87,6 +89,19 @@ class TeamModelTest(TestCase):
         self.team.members.add(member)
         self.assertIn(member, self.team.members.all())
 
+    def test_get_user_role_reflects_membership_changes(self):
+        """Test that role checks on the same instance see later membership changes."""
+        member = User.objects.create_user(username="member", password="testpass123")
+        self.assertIsNone(self.team.get_user_role(member))
+
+        membership = TeamMembership.objects.create(team=self.team, user=member, role='member')
+        self.assertTrue(self.team.is_user_member(member))
+        self.assertFalse(self.team.is_user_admin(member))
+
+        membership.role = 'admin'
+        membership.save()
+        self.assertTrue(self.team.is_user_admin(member))
+
 
 class DriverModelTest(TestCase):
     """Test the Driver model."""
@@ -118,6 +133,18 @@ class DriverModelTest(TestCase):
         self.driver.refresh_from_db()
         self.assertEqual(str(self.driver.api_token), token)
 
+    def test_api_token_unique_when_set(self):
+        """Test that two drivers cannot share a token but may both have none."""
+        other_user = User.objects.create_user(username="otherdriver", password="testpass123")
+        other_driver = Driver.objects.get(user=other_user)
+        self.assertIsNone(self.driver.api_token)
+        self.assertIsNone(other_driver.api_token)
+
+        token = self.driver.generate_api_token()
+        other_driver.api_token = token
+        with self.assertRaises(IntegrityError):
+            other_driver.save()
+
 
 class SessionModelTest(TestCase):
     """Test the Session model."""
@@ -264,3 +291,12 @@ class TelemetryDataModelTest(TestCase):
         retrieved = TelemetryData.objects.get(lap=self.lap)
         self.assertEqual(retrieved.data['Speed'], [100, 110, 120])
         self.assertEqual(retrieved.data['Throttle'], [0.8, 0.9, 1.0])
+
+    def test_channel_array(self):
+        """Test that channels are returned as cached float32 NumPy arrays."""
+        speed = self.telemetry.channel_array('Speed')
+
+        self.assertEqual(speed.dtype, np.float32)
+        self.assertEqual(speed.tolist(), [100.0, 110.0, 120.0])
+        self.assertIs(self.telemetry.channel_array('Speed'), speed)
+        self.assertEqual(len(self.telemetry.channel_array('RPM')), 0)
@@ -0,0 +1,323 @@
+"""
+Utility function tests for the Ridgway Garage telemetry app.
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+import orjson
+import requests
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from telemetry.models import Session, Lap, TelemetryData, Track, Car, Team
+from telemetry.services.discord_notifications import build_lap_share_message
+from telemetry.tasks import share_lap_to_discord
+from telemetry.utils.api_tokens import get_user_for_api_token
+from telemetry.utils.downsample import lttb, lttb_indices
+from telemetry.utils.export import (
+    build_lap_export_data,
+    compress_lap_export_data,
+    import_lap_from_data,
+    iter_compressed_lap_export_data,
+)
+
+User = get_user_model()
+
+
+class LapExportTest(TestCase):
+    """Test lap export and import helpers."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testdriver", password="testpass123")
+        self.track = Track.objects.create(name="Test Track", configuration="Full")
+        self.car = Car.objects.create(name="Test Car")
+        self.ibt_file = SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream")
+
+        self.session = Session.objects.create(
+            driver=self.user,
+            track=self.track,
+            car=self.car,
+            ibt_file=self.ibt_file,
+            processing_status="completed",
+            air_temp=21.5,
+        )
+
+        self.lap = Lap.objects.create(
+            session=self.session,
+            lap_number=3,
+            lap_time=92.345,
+            sector1_time=30.1,
+            is_valid=True
+        )
+
+        self.telemetry = TelemetryData.objects.create(
+            lap=self.lap,
+            data={
+                'Speed': [10.5, 20.25, 30.125],
+                'LapDist': [0.0, 100.0, 200.0],
+            },
+            sample_count=3,
+            max_speed=108.45,
+        )
+
+    def test_compress_lap_export_data_is_valid_gzip_json(self):
+        """Test that compressed export data decompresses to the original structure."""
+        self.lap.refresh_from_db()
+        export_data = build_lap_export_data(self.lap, self.lap.telemetry)
+
+        compressed = compress_lap_export_data(export_data)
+
+        self.assertIsInstance(compressed, bytes)
+        decoded = json.loads(gzip.decompress(compressed))
+        self.assertEqual(decoded['format_version'], '1.0')
+        self.assertEqual(decoded['lap']['lap_time'], 92.345)
+        self.assertEqual(decoded['session']['track_name'], 'Test Track')
+        self.assertEqual(decoded['telemetry']['data']['Speed'], [10.5, 20.25, 30.125])
+
+    def test_exported_at_is_utc(self):
+        """Test that the export timestamp is a UTC ISO 8601 string ending in Z."""
+        self.lap.refresh_from_db()
+        export_data = build_lap_export_data(self.lap, self.lap.telemetry)
+
+        exported_at = export_data['exported_at']
+        self.assertTrue(exported_at.endswith('Z'))
+        self.assertEqual(datetime.fromisoformat(exported_at).utcoffset(), timedelta(0))
+
+    def test_iter_compressed_lap_export_data_matches_compressed_payload(self):
+        """Test that streamed gzip chunks decode to the same JSON as the one-shot helper."""
+        self.lap.refresh_from_db()
+        export_data = build_lap_export_data(self.lap, self.lap.telemetry)
+
+        chunks = list(iter_compressed_lap_export_data(export_data, chunk_size=16))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            gzip.decompress(b''.join(chunks)),
+            gzip.decompress(compress_lap_export_data(export_data))
+        )
+
+    def test_iter_compressed_lap_export_data_serializes_channels_separately(self):
+        """Test that channel-by-channel serialization decodes to the full export."""
+        self.lap.refresh_from_db()
+        export_data = build_lap_export_data(self.lap, self.lap.telemetry)
+
+        decoded = json.loads(gzip.decompress(b''.join(iter_compressed_lap_export_data(export_data))))
+
+        self.assertEqual(decoded, json.loads(json.dumps(export_data)))
+        self.assertEqual(list(decoded['telemetry']['data']), ['Speed', 'LapDist'])
+
+    def test_iter_compressed_lap_export_data_handles_minimal_sections(self):
+        """Test that empty envelope/telemetry sections still produce valid JSON."""
+        for export_data in (
+            {'telemetry': {'data': {}}},
+            {'telemetry': {'data': {'Speed': [1.0]}}},
+            {'telemetry': {'data': {'Speed': [1.0]}, 'sample_count': 1}, 'format_version': '1.0'},
+        ):
+            with self.subTest(export_data=export_data):
+                decoded = orjson.loads(gzip.decompress(b''.join(iter_compressed_lap_export_data(export_data))))
+                self.assertEqual(decoded, export_data)
+
+    def test_export_import_round_trip(self):
+        """Test that an exported lap can be imported back for another user."""
+        other_user = User.objects.create_user(username="otherdriver", password="testpass123")
+        self.lap.refresh_from_db()
+        export_data = build_lap_export_data(self.lap, self.lap.telemetry)
+        data = json.loads(gzip.decompress(compress_lap_export_data(export_data)))
+
+        imported_lap = import_lap_from_data(data, other_user)
+
+        self.assertEqual(imported_lap.session.driver, other_user)
+        self.assertEqual(imported_lap.session.session_type, 'imported')
+        self.assertEqual(imported_lap.session.track, self.track)
+        self.assertEqual(imported_lap.session.car, self.car)
+        self.assertEqual(float(imported_lap.lap_time), 92.345)
+        self.assertEqual(imported_lap.telemetry.data['LapDist'], [0.0, 100.0, 200.0])
+        self.assertEqual(imported_lap.telemetry.sample_count, 3)
+
+    def test_import_converts_numbers_to_decimal(self):
+        """Test that imported float fields become Decimals without precision noise."""
+        self.lap.refresh_from_db()
+        data = build_lap_export_data(self.lap, self.lap.telemetry)
+
+        imported_lap = import_lap_from_data(data, self.user)
+
+        self.assertIsInstance(imported_lap.lap_time, Decimal)
+        self.assertEqual(imported_lap.lap_time, Decimal('92.345'))
+        self.assertEqual(imported_lap.sector1_time, Decimal('30.1'))
+        self.assertIsNone(imported_lap.sector2_time)
+        self.assertEqual(imported_lap.session.air_temp, Decimal('21.5'))
+        self.assertEqual(imported_lap.telemetry.max_speed, Decimal('108.45'))
+
+
+class DiscordLapShareTest(TestCase):
+    """Test the Discord lap share message and background task."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testdriver", password="testpass123")
+        self.track = Track.objects.create(name="Test Track", configuration="Full")
+        self.car = Car.objects.create(name="Test Car")
+        self.session = Session.objects.create(
+            driver=self.user,
+            track=self.track,
+            car=self.car,
+            ibt_file=SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream"),
+            processing_status="completed",
+        )
+        self.lap = Lap.objects.create(session=self.session, lap_number=1, lap_time=92.345, is_valid=True)
+        TelemetryData.objects.create(lap=self.lap, data={'Speed': [1.0]}, sample_count=1)
+        self.webhook_url = "https://discord.com/api/webhooks/123/abc"
+
+    def _response(self, status_code):
+        """Build a requests.Response with the given status code."""
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = self.webhook_url
+        return response
+
+    def test_build_lap_share_message(self):
+        """Test that the share message includes driver, track, time and notes."""
+        message = build_lap_share_message(self.lap, notes="Tyres were cold")
+
+        self.assertIn("**Driver:** testdriver", message)
+        self.assertIn("**Track:** Test Track - Full", message)
+        self.assertIn("**Time:** 1:32.345 (Valid)", message)
+        self.assertIn("> Tyres were cold", message)
+
+    def test_share_task_skips_team_without_webhook(self):
+        """Test that the task does nothing when the team has no webhook."""
+        team = Team.objects.create(name="Test Team", owner=self.user)
+
+        result = share_lap_to_discord.apply(args=(self.lap.id, team.id)).get()
+
+        self.assertFalse(result)
+
+    def test_share_task_skips_missing_lap(self):
+        """Test that the task does nothing when the lap was deleted."""
+        team = Team.objects.create(name="Test Team", owner=self.user)
+
+        result = share_lap_to_discord.apply(args=(self.lap.id + 1000, team.id)).get()
+
+        self.assertFalse(result)
+
+    def test_share_task_skips_lap_without_telemetry(self):
+        """Test that the task does nothing when the lap's telemetry was removed."""
+        team = Team.objects.create(name="Test Team", owner=self.user, discord_webhook_url=self.webhook_url)
+        TelemetryData.objects.filter(lap=self.lap).delete()
+
+        with mock.patch('telemetry.services.discord_notifications.requests.post') as post:
+            result = share_lap_to_discord.apply(args=(self.lap.id, team.id)).get()
+
+        self.assertFalse(result)
+        post.assert_not_called()
+
+    def test_share_task_posts_to_webhook(self):
+        """Test that a 204 from Discord counts as a successful share."""
+        team = Team.objects.create(name="Test Team", owner=self.user, discord_webhook_url=self.webhook_url)
+
+        with mock.patch('telemetry.services.discord_notifications.requests.post') as post:
+            post.return_value = self._response(204)
+            result = share_lap_to_discord.apply(args=(self.lap.id, team.id)).get()
+
+        self.assertTrue(result)
+        self.assertEqual(post.call_args.args[0], self.webhook_url)
+        self.assertIn('file', post.call_args.kwargs['files'])
+
+    def test_share_task_retries_transient_errors(self):
+        """Test that 429/5xx responses raise HTTPError and are retried."""
+        team = Team.objects.create(name="Test Team", owner=self.user, discord_webhook_url=self.webhook_url)
+
+        for status_code in (429, 503):
+            with self.subTest(status_code=status_code), \
+                    mock.patch('telemetry.services.discord_notifications.requests.post') as post:
+                post.return_value = self._response(status_code)
+
+                with self.assertRaises(requests.HTTPError):
+                    share_lap_to_discord.apply(args=(self.lap.id, team.id)).get()
+
+                # First attempt plus max_retries
+                self.assertEqual(post.call_count, share_lap_to_discord.max_retries + 1)
+
+
+class ApiTokenTest(TestCase):
+    """Test API token resolution shared by the REST API and WebSocket consumer."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testdriver", password="testpass123")
+        self.token = self.user.driver_profile.generate_api_token()
+
+    def test_valid_token_resolves_user(self):
+        """Test that a generated token resolves to its owner."""
+        self.assertEqual(get_user_for_api_token(self.token), self.user)
+
+    def test_unknown_token_returns_none(self):
+        """Test that a well-formed but unknown token resolves to None."""
+        self.assertIsNone(get_user_for_api_token('a' * 64))
+
+    def test_malformed_token_skips_query(self):
+        """Test that malformed tokens are rejected without a database query."""
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_user_for_api_token('not a token'))
+            self.assertIsNone(get_user_for_api_token(''))
+            self.assertIsNone(get_user_for_api_token(None))
+
+    def test_resolved_token_is_cached(self):
+        """Test that repeat lookups of a token only load the user by primary key."""
+        get_user_for_api_token(self.token)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_for_api_token(self.token), self.user)
+
+    def test_deleted_user_token_is_rejected_immediately(self):
+        """Test that a cached token stops resolving once its user is deleted."""
+        get_user_for_api_token(self.token)
+
+        self.user.delete()
+
+        self.assertIsNone(get_user_for_api_token(self.token))
+
+    def test_regenerated_token_is_rejected_immediately(self):
+        """Test that replacing a token drops the old one from the cache."""
+        get_user_for_api_token(self.token)
+
+        new_token = self.user.driver_profile.generate_api_token()
+
+        self.assertIsNone(get_user_for_api_token(self.token))
+        self.assertEqual(get_user_for_api_token(new_token), self.user)
+
+
+class DownsampleTest(TestCase):
+    """Test LTTB chart downsampling."""
+
+    def test_short_lines_are_unchanged(self):
+        """Test that lines already under the limit are returned as-is."""
+        x = np.arange(10.0)
+        y = np.arange(10.0)
+
+        x_ds, y_ds = lttb(x, y, n_out=20)
+
+        self.assertIs(x_ds, x)
+        self.assertIs(y_ds, y)
+
+    def test_keeps_ends_and_peaks(self):
+        """Test that the first/last points and sharp peaks survive downsampling."""
+        y = np.zeros(1000)
+        y[400] = 50.0
+        y[700] = -30.0
+
+        indices = lttb_indices(np.arange(1000.0), y, 50)
+
+        self.assertEqual(len(indices), 50)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 999)
+        self.assertIn(400, indices)
+        self.assertIn(700, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
@@ -2,12 +2,20 @@
 View tests for the Ridgway Garage telemetry app.
 """
 
+import gzip
+import json
+
 from django.test import TestCase, Client
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from telemetry.models import Session, Lap, TelemetryData, Track, Car, Team
+from telemetry.models import (
+    Session, Lap, TelemetryData, Track, Car, Team, TeamMembership, JoinRequest, TeamInvitation
+)
 
 User = get_user_model()
 
@@ -29,6 +37,36 @@ class HomeViewTest(TestCase):
         response = self.client.get(reverse('telemetry:home'))
         self.assertEqual(response.status_code, 200)
 
+    def test_home_stats_for_logged_in_user(self):
+        """Test that home stats count sessions/laps and pick the fastest valid lap."""
+        user = User.objects.create_user(username="testdriver", password="testpass123")
+        self.client.login(username="testdriver", password="testpass123")
+        track = Track.objects.create(name="Test Track")
+        car = Car.objects.create(name="Test Car")
+        session = Session.objects.create(
+            driver=user,
+            track=track,
+            car=car,
+            ibt_file=SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream"),
+            processing_status="completed"
+        )
+        Lap.objects.create(session=session, lap_number=1, lap_time=88.0, is_valid=False)
+        best = Lap.objects.create(session=session, lap_number=2, lap_time=90.5, is_valid=True)
+        Lap.objects.create(session=session, lap_number=3, lap_time=91.0, is_valid=True)
+
+        response = self.client.get(reverse('telemetry:home'))
+
+        self.assertEqual(response.status_code, 200)
+        stats = response.context['stats']
+        self.assertEqual(stats['total_sessions'], 1)
+        self.assertEqual(stats['total_laps'], 3)
+        self.assertEqual(stats['best_lap'], best)
+        self.assertEqual(stats['processing'], 0)
+
+        recent_sessions = response.context['recent_sessions']
+        self.assertEqual(recent_sessions, [session])
+        self.assertEqual(recent_sessions[0].best_lap, best)
+
 
 class SessionListViewTest(TestCase):
     """Test the session list view."""
@@ -86,12 +124,67 @@ class SessionListViewTest(TestCase):
         for session in sessions:
             self.assertEqual(session.driver, self.user)
 
+    def test_session_list_best_lap_from_valid_laps(self):
+        """Test that each session exposes its valid laps and fastest valid lap."""
+        Lap.objects.create(session=self.session, lap_number=1, lap_time=101.0, is_valid=True)
+        fast = Lap.objects.create(session=self.session, lap_number=2, lap_time=99.5, is_valid=True)
+        Lap.objects.create(session=self.session, lap_number=3, lap_time=90.0, is_valid=False)
+
+        response = self.client.get(reverse('telemetry:session_list'))
+
+        session = response.context['page_obj'].object_list[0]
+        self.assertEqual([lap.lap_number for lap in session.valid_laps], [1, 2])
+        self.assertEqual(session.best_lap, fast)
+
+    def test_session_list_filter_options_follow_sessions(self):
+        """Test that track/car filter options only list driven combos and refresh on upload."""
+        Track.objects.create(name="Undriven Track")
+        response = self.client.get(reverse('telemetry:session_list'))
+        self.assertEqual(list(response.context['tracks']), [self.track])
+        self.assertEqual(list(response.context['cars']), [self.car])
+
+        new_track = Track.objects.create(name="New Track")
+        with self.captureOnCommitCallbacks(execute=True):
+            Session.objects.create(
+                driver=self.user,
+                track=new_track,
+                car=self.car,
+                processing_status="completed"
+            )
+
+        response = self.client.get(reverse('telemetry:session_list'))
+        self.assertEqual(list(response.context['tracks']), [new_track, self.track])
+
+    def test_live_telemetry_saves_keep_filter_options_cached(self):
+        """Test that update_fields saves of unrelated fields don't clear the filter cache."""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.session.save(update_fields=['last_telemetry_update'])
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.session.save(update_fields=['track'])
+        self.assertNotEqual(callbacks, [])
+
+    def test_reassigned_session_clears_both_drivers_filter_options(self):
+        """Test that moving a session to another driver refreshes the previous owner's options."""
+        response = self.client.get(reverse('telemetry:session_list'))
+        self.assertEqual(list(response.context['tracks']), [self.track])
+
+        other_user = User.objects.create_user(username="other", password="testpass123")
+        self.session.driver = other_user
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+
+        response = self.client.get(reverse('telemetry:session_list'))
+        self.assertEqual(list(response.context['tracks']), [])
+
 
 class LeaderboardViewTest(TestCase):
     """Test the leaderboard view."""
 
     def setUp(self):
         self.client = Client()
+        cache.clear()
         self.user = User.objects.create_user(username="testdriver", password="testpass123")
         self.track = Track.objects.create(name="Test Track")
         self.car = Car.objects.create(name="Test Car")
@@ -147,6 +240,87 @@ class LeaderboardViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('page_obj', response.context)
 
+    def test_leaderboard_best_lap_per_driver(self):
+        """Test that each driver appears once with their fastest valid lap."""
+        other = User.objects.create_user(username="otherdriver", password="testpass123")
+        other.driver_profile.display_name = "Other Driver"
+        other.driver_profile.save()
+        ibt = SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream")
+
+        session = Session.objects.create(
+            driver=self.user, track=self.track, car=self.car, ibt_file=ibt, processing_status="completed"
+        )
+        Lap.objects.create(session=session, lap_number=1, lap_time=101.0, is_valid=True)
+        user_best = Lap.objects.create(session=session, lap_number=2, lap_time=99.5, is_valid=True)
+        Lap.objects.create(session=session, lap_number=3, lap_time=90.0, is_valid=False)
+
+        other_session = Session.objects.create(
+            driver=other, track=self.track, car=self.car, ibt_file=ibt, processing_status="completed"
+        )
+        other_best = Lap.objects.create(session=other_session, lap_number=1, lap_time=98.0, is_valid=True)
+
+        # One leaderboard query plus the two (uncached) filter option lists
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('telemetry:leaderboards'),
+                {'track': self.track.id, 'car': self.car.id}
+            )
+
+        entries = list(response.context['leaderboard_entries'])
+        self.assertEqual([entry['lap'] for entry in entries], [other_best, user_best])
+        self.assertEqual(entries[0]['driver'], "Other Driver")
+        self.assertEqual(entries[0]['track'], "Test Track")
+        self.assertEqual(entries[1]['driver_id'], self.user.id)
+
+    def test_leaderboard_filter_options_only_list_tracks_with_laps(self):
+        """Test that filter options list tracks/cars with laps and refresh on new sessions."""
+        Track.objects.create(name="Empty Track")
+        response = self.client.get(reverse('telemetry:leaderboards'))
+        self.assertEqual(response.context['tracks'], [])
+
+        ibt = SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream")
+        session = Session.objects.create(
+            driver=self.user, track=self.track, car=self.car, ibt_file=ibt, processing_status="pending"
+        )
+        Lap.objects.create(session=session, lap_number=1, lap_time=100.0, is_valid=True)
+        session.processing_status = "completed"
+        with self.captureOnCommitCallbacks(execute=True):
+            session.save()
+
+        response = self.client.get(reverse('telemetry:leaderboards'))
+        self.assertEqual(response.context['tracks'], [self.track])
+        self.assertEqual(response.context['cars'], [self.car])
+
+    def test_leaderboard_filter_options_survive_status_only_saves(self):
+        """Test that saves which can't change a session's track/car keep the leaderboard cache."""
+        session = Session.objects.create(
+            driver=self.user, track=self.track, car=self.car, processing_status="pending"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            session.save(update_fields=['processing_status'])
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            session.save(update_fields=['driver'])
+        # Only the per-user filter options are cleared
+        self.assertEqual(len(callbacks), 1)
+
+    def test_leaderboard_filter_options_drop_track_when_last_lap_deleted(self):
+        """Test that deleting a track's last lap removes it from the leaderboard filters."""
+        session = Session.objects.create(
+            driver=self.user, track=self.track, car=self.car, processing_status="completed"
+        )
+        lap = Lap.objects.create(session=session, lap_number=1, lap_time=100.0, is_valid=True)
+        response = self.client.get(reverse('telemetry:leaderboards'))
+        self.assertEqual(response.context['tracks'], [self.track])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lap.delete()
+
+        response = self.client.get(reverse('telemetry:leaderboards'))
+        self.assertEqual(response.context['tracks'], [])
+
 
 class AnalysisDashboardViewTest(TestCase):
     """Test the analysis dashboard view."""
@@ -194,6 +368,57 @@ class AnalysisDashboardViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.context['preloaded_lap_id'], lap.id)
 
+    def test_analysis_with_preloaded_session(self):
+        """Test loading analysis with a session ID preloads its fastest valid laps."""
+        ibt = SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream")
+        session = Session.objects.create(
+            driver=self.user,
+            track=self.track,
+            car=self.car,
+            ibt_file=ibt,
+            processing_status="completed"
+        )
+        slow = Lap.objects.create(session=session, lap_number=1, lap_time=101.0, is_valid=True)
+        fast = Lap.objects.create(session=session, lap_number=2, lap_time=99.0, is_valid=True)
+        Lap.objects.create(session=session, lap_number=3, lap_time=95.0, is_valid=False)
+
+        response = self.client.get(
+            reverse('telemetry:analysis'),
+            {'session': session.id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['preloaded_session_laps'], f'{fast.id},{slow.id}')
+        self.assertEqual(response.context['selected_track'], self.track)
+
+    def test_analysis_defaults_to_recent_best_lap(self):
+        """Test that without parameters the most recent session's best lap and the PB load."""
+        ibt = SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream")
+        older = Session.objects.create(
+            driver=self.user,
+            track=self.track,
+            car=self.car,
+            ibt_file=ibt,
+            processing_status="completed",
+            session_date="2024-01-01T12:00:00Z"
+        )
+        personal_best = Lap.objects.create(session=older, lap_number=1, lap_time=97.0, is_valid=True)
+        recent = Session.objects.create(
+            driver=self.user,
+            track=self.track,
+            car=self.car,
+            ibt_file=ibt,
+            processing_status="completed",
+            session_date="2024-02-01T12:00:00Z"
+        )
+        Lap.objects.create(session=recent, lap_number=1, lap_time=101.0, is_valid=True)
+        recent_best = Lap.objects.create(session=recent, lap_number=2, lap_time=99.0, is_valid=True)
+
+        response = self.client.get(reverse('telemetry:analysis'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['initial_laps'], [recent_best, personal_best])
+        self.assertEqual(response.context['selected_car'], self.car)
+
 
 class UserSettingsViewTest(TestCase):
     """Test the user settings view."""
@@ -213,3 +438,333 @@ class UserSettingsViewTest(TestCase):
         """Test that settings page loads for authenticated user."""
         response = self.client.get(reverse('telemetry:user_settings'))
         self.assertEqual(response.status_code, 200)
+
+    def test_settings_invalid_password_change_keeps_bound_form(self):
+        """Test that a failed password change re-renders with only that form bound."""
+        response = self.client.post(reverse('telemetry:user_settings'), {
+            'change_password': '1',
+            'old_password': 'wrongpass',
+            'new_password1': 'newpass12345!',
+            'new_password2': 'newpass12345!',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['password_form'].is_bound)
+        self.assertTrue(response.context['password_form'].errors)
+        self.assertFalse(response.context['settings_form'].is_bound)
+
+    def test_settings_generate_token(self):
+        """Test that generating a token stores it on the driver profile."""
+        response = self.client.post(reverse('telemetry:user_settings'), {'generate_token': '1'})
+
+        self.assertEqual(response.status_code, 302)
+        self.user.driver_profile.refresh_from_db()
+        self.assertTrue(self.user.driver_profile.api_token)
+
+
+class LapExportViewTest(TestCase):
+    """Test the lap export view."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="testdriver", password="testpass123")
+        self.client.login(username="testdriver", password="testpass123")
+
+        self.track = Track.objects.create(name="Test Track")
+        self.car = Car.objects.create(name="Test Car")
+        ibt = SimpleUploadedFile("test.ibt", b"fake", content_type="application/octet-stream")
+        self.session = Session.objects.create(
+            driver=self.user,
+            track=self.track,
+            car=self.car,
+            ibt_file=ibt,
+            processing_status="completed"
+        )
+        self.lap = Lap.objects.create(
+            session=self.session,
+            lap_number=1,
+            lap_time=100.0,
+            is_valid=True
+        )
+        TelemetryData.objects.create(
+            lap=self.lap,
+            data={'Speed': [100, 110, 120], 'LapDist': [0, 100, 200]},
+            sample_count=3
+        )
+
+    async def test_lap_export_streams_gzip_file(self):
+        """Test that lap export returns a .lap.gz attachment streamed asynchronously."""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('telemetry:lap_export', args=[self.lap.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        # Under ASGI only async iterators are streamed instead of buffered
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.lap.gz', response['Content-Disposition'])
+
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        data = json.loads(gzip.decompress(content))
+        self.assertEqual(data['lap']['lap_number'], 1)
+        self.assertEqual(data['telemetry']['data']['Speed'], [100, 110, 120])
+
+    def test_lap_export_denied_for_other_driver(self):
+        """Test that users cannot export another driver's lap."""
+        User.objects.create_user(username="otherdriver", password="testpass123")
+        self.client.login(username="otherdriver", password="testpass123")
+
+        response = self.client.get(reverse('telemetry:lap_export', args=[self.lap.id]))
+        self.assertEqual(response.status_code, 302)
+
+
+class TeamCreateViewTest(TestCase):
+    """Test the team create view."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="testpass123")
+        self.client.login(username="creator", password="testpass123")
+
+    def test_creator_becomes_owner_member(self):
+        """Test that creating a team makes the creator its owner member."""
+        response = self.client.post(reverse('telemetry:team_create'), {
+            'name': 'New Team',
+            'description': '',
+            'is_public': True,
+            'allow_join_requests': True,
+        })
+
+        team = Team.objects.get(name='New Team')
+        self.assertRedirects(response, reverse('telemetry:team_detail', args=[team.pk]))
+        self.assertEqual(team.owner, self.user)
+        self.assertEqual(
+            list(team.teammembership_set.values_list('user_id', 'role')),
+            [(self.user.pk, 'owner')]
+        )
+
+
+class TeamInviteUserViewTest(TestCase):
+    """Test inviting users to a team."""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(username="owner", password="testpass123")
+        self.member = User.objects.create_user(username="member", email="member@example.com", password="testpass123")
+        self.team = Team.objects.create(name="Test Team", owner=self.owner)
+        TeamMembership.objects.create(team=self.team, user=self.owner, role='owner')
+        TeamMembership.objects.create(team=self.team, user=self.member, role='member')
+        self.client.login(username="owner", password="testpass123")
+        self.url = reverse('telemetry:team_invite_user', args=[self.team.pk])
+
+    def test_invite_links_existing_user(self):
+        """Test that inviting a registered email links the invitation to that user."""
+        invitee = User.objects.create_user(username="invitee", email="invitee@example.com", password="testpass123")
+        # A second account on the same address must not break the lookup
+        User.objects.create_user(username="invitee2", email="invitee@example.com", password="testpass123")
+
+        response = self.client.post(self.url, {'email': 'invitee@example.com', 'message': ''})
+
+        self.assertRedirects(response, reverse('telemetry:team_manage_invites', args=[self.team.pk]))
+        self.assertEqual(TeamInvitation.objects.get(team=self.team).invited_user, invitee)
+
+    def test_invite_unknown_email(self):
+        """Test that an email without an account is still invited."""
+        self.client.post(self.url, {'email': 'nobody@example.com', 'message': ''})
+
+        self.assertIsNone(TeamInvitation.objects.get(team=self.team).invited_user)
+
+    def test_invite_existing_member_is_refused(self):
+        """Test that members can't be invited again."""
+        response = self.client.post(self.url, {'email': 'member@example.com', 'message': ''})
+
+        self.assertRedirects(response, reverse('telemetry:team_detail', args=[self.team.pk]))
+        self.assertFalse(TeamInvitation.objects.filter(team=self.team).exists())
+
+
+class TeamDetailViewTest(TestCase):
+    """Test the team detail view."""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(username="owner", password="testpass123")
+        self.member = User.objects.create_user(username="member", password="testpass123")
+        self.outsider = User.objects.create_user(username="outsider", password="testpass123")
+
+        self.team = Team.objects.create(name="Test Team", owner=self.owner)
+        TeamMembership.objects.create(team=self.team, user=self.owner, role='owner')
+        TeamMembership.objects.create(team=self.team, user=self.member, role='member')
+
+    def test_team_detail_for_owner(self):
+        """Test that the owner sees their role and the member list."""
+        self.client.login(username="owner", password="testpass123")
+        response = self.client.get(reverse('telemetry:team_detail', args=[self.team.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_member'])
+        self.assertTrue(response.context['is_owner'])
+        self.assertEqual(response.context['user_role'], 'owner')
+        self.assertEqual(len(response.context['memberships']), 2)
+
+    def test_team_detail_for_member(self):
+        """Test that a regular member is recognised with the member role."""
+        self.client.login(username="member", password="testpass123")
+        response = self.client.get(reverse('telemetry:team_detail', args=[self.team.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_member'])
+        self.assertFalse(response.context['is_owner'])
+        self.assertEqual(response.context['user_role'], 'member')
+
+    def test_team_detail_for_non_member(self):
+        """Test that a non-member has no role."""
+        self.client.login(username="outsider", password="testpass123")
+        response = self.client.get(reverse('telemetry:team_detail', args=[self.team.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['is_member'])
+        self.assertIsNone(response.context['user_role'])
+        self.assertFalse(response.context['has_pending_request'])
+
+    def test_team_detail_shows_pending_request(self):
+        """Test that a non-member with a pending request is told so."""
+        JoinRequest.objects.create(team=self.team, user=self.outsider)
+        self.client.login(username="outsider", password="testpass123")
+        response = self.client.get(reverse('telemetry:team_detail', args=[self.team.pk]))
+
+        self.assertTrue(response.context['has_pending_request'])
+
+    def test_cancel_pending_request(self):
+        """Test that a user can cancel their pending join request."""
+        JoinRequest.objects.create(team=self.team, user=self.outsider)
+        self.client.login(username="outsider", password="testpass123")
+
+        response = self.client.post(reverse('telemetry:team_cancel_request', args=[self.team.pk]))
+
+        self.assertRedirects(response, reverse('telemetry:team_detail', args=[self.team.pk]))
+        self.assertFalse(JoinRequest.objects.filter(team=self.team, user=self.outsider).exists())
+
+    def test_cancel_without_pending_request(self):
+        """Test that cancelling with nothing pending reports an error."""
+        self.client.login(username="outsider", password="testpass123")
+
+        response = self.client.post(
+            reverse('telemetry:team_cancel_request', args=[self.team.pk]), follow=True
+        )
+
+        self.assertContains(response, "No pending join request found.")
+
+    def test_team_detail_skips_pending_check_for_members(self):
+        """Test that members don't pay for the pending request lookup."""
+        self.client.login(username="member", password="testpass123")
+        url = reverse('telemetry:team_detail', args=[self.team.pk])
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertFalse(response.context['has_pending_request'])
+        self.assertFalse(any('telemetry_joinrequest' in q['sql'] for q in queries))
+
+
+class TeamListViewTest(TestCase):
+    """Test the team list view."""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(username="owner", password="testpass123")
+        self.member = User.objects.create_user(username="member", password="testpass123")
+        self.outsider = User.objects.create_user(username="outsider", password="testpass123")
+
+        self.team = Team.objects.create(name="Test Team", owner=self.owner, allow_join_requests=True)
+        TeamMembership.objects.create(team=self.team, user=self.owner, role='owner')
+        TeamMembership.objects.create(team=self.team, user=self.member, role='member')
+
+    def test_member_sees_full_member_count(self):
+        """Test that a member's team lists every member, not just themselves."""
+        self.client.login(username="member", password="testpass123")
+        response = self.client.get(reverse('telemetry:team_list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t.member_count for t in response.context['user_teams']], [2])
+        self.assertContains(response, "2 members")
+
+    def test_owner_checks_do_not_load_owners(self):
+        """Test that the owner badge doesn't load each team's owner."""
+        self.client.login(username="member", password="testpass123")
+        url = reverse('telemetry:team_list')
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        other_owner = User.objects.create_user(username="owner2", password="testpass123")
+        other_team = Team.objects.create(name="Other Team", owner=other_owner)
+        TeamMembership.objects.create(team=other_team, user=self.member, role='member')
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+
+        self.assertEqual(len(before), len(after))
+
+    def test_outsider_sees_public_team_and_pending_request(self):
+        """Test that non-members see joinable teams with counts and pending status."""
+        JoinRequest.objects.create(team=self.team, user=self.outsider)
+        self.client.login(username="outsider", password="testpass123")
+        response = self.client.get(reverse('telemetry:team_list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t.member_count for t in response.context['public_teams']], [2])
+        self.assertEqual(response.context['pending_requests'], {self.team.pk})
+        self.assertContains(response, "Pending")
+
+
+class TeamManageRequestsViewTest(TestCase):
+    """Test the join request management view."""
+
+    def setUp(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(username="owner", password="testpass123")
+        self.team = Team.objects.create(name="Test Team", owner=self.owner, allow_join_requests=True)
+        TeamMembership.objects.create(team=self.team, user=self.owner, role='owner')
+
+        for i in range(3):
+            applicant = User.objects.create_user(username=f"applicant{i}", password="testpass123")
+            JoinRequest.objects.create(team=self.team, user=applicant, message=f"Let me in {i}")
+        reviewed = User.objects.create_user(username="reviewed", password="testpass123")
+        JoinRequest.objects.create(team=self.team, user=reviewed).reject(rejected_by=self.owner)
+
+    def test_lists_pending_and_recent_requests(self):
+        """Test that requests render with names, messages and reviewer."""
+        self.client.login(username="owner", password="testpass123")
+        response = self.client.get(reverse('telemetry:team_manage_requests', args=[self.team.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['pending_requests']), 3)
+        self.assertEqual(len(response.context['recent_requests']), 1)
+        self.assertContains(response, "applicant0")
+        self.assertContains(response, "Let me in 2")
+        self.assertContains(response, "reviewed")
+
+    def test_non_admin_is_redirected(self):
+        """Test that plain members are sent back to the team page."""
+        member = User.objects.create_user(username="member", password="testpass123")
+        TeamMembership.objects.create(team=self.team, user=member, role='member')
+        self.client.login(username="member", password="testpass123")
+
+        response = self.client.get(reverse('telemetry:team_manage_requests', args=[self.team.pk]))
+
+        self.assertRedirects(response, reverse('telemetry:team_detail', args=[self.team.pk]))
+
+    def test_request_rows_do_not_add_queries(self):
+        """Test that more pending requests don't add per-row queries."""
+        self.client.login(username="owner", password="testpass123")
+        url = reverse('telemetry:team_manage_requests', args=[self.team.pk])
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        extra = User.objects.create_user(username="applicant9", password="testpass123")
+        JoinRequest.objects.create(team=self.team, user=extra)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+
+        self.assertEqual(len(before), len(after))
@@ -0,0 +1,73 @@
+"""
+API token authentication helpers.
+
+Shared by the REST API decorator and the live telemetry WebSocket consumer so
+both resolve client tokens the same way.
+"""
+
+import hashlib
+import re
+
+from django.core.cache import cache
+
+# Tokens are generated with secrets.token_urlsafe(); anything else can't match a driver
+TOKEN_RE = re.compile(r'\A[A-Za-z0-9_-]{32,64}\Z')
+
+# Seconds to remember which user a token belongs to
+API_TOKEN_CACHE_TIMEOUT = 60
+
+
+def is_valid_token_format(token_key):
+    """Return True if token_key could be an API token issued by Driver.generate_api_token()."""
+    return bool(token_key) and TOKEN_RE.match(token_key) is not None
+
+
+def _token_cache_key(token_key):
+    """Return the cache key for a token (hashed, so raw tokens never reach the cache)."""
+    return f'api_token:{hashlib.sha256(token_key.encode()).hexdigest()}'
+
+
+def get_user_for_api_token(token_key):
+    """
+    Resolve an API token to its user.
+
+    Malformed tokens are rejected without a query; well-formed ones are looked
+    up through the partial unique index on Driver.api_token. The owner's id is
+    cached for API_TOKEN_CACHE_TIMEOUT seconds, so a client streaming uploads
+    only pays for a primary-key lookup of the user on repeat requests instead
+    of the Driver/User join. The user itself is loaded fresh each time, so a
+    deleted account stops authenticating at once.
+
+    Args:
+        token_key: Token string sent by the client
+
+    Returns:
+        User or None: The token's owner, or None if no driver has this token
+    """
+    from django.contrib.auth import get_user_model
+    from ..models import Driver
+
+    if not is_valid_token_format(token_key):
+        return None
+
+    cache_key = _token_cache_key(token_key)
+    user_id = cache.get(cache_key)
+    if user_id is not None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None:
+            cache.delete(cache_key)
+        return user
+
+    try:
+        user = Driver.objects.select_related('user').get(api_token=token_key).user
+    except Driver.DoesNotExist:
+        return None
+
+    cache.set(cache_key, user.pk, API_TOKEN_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_api_token(token_key):
+    """Drop a token's cached user (called when the token is replaced or its driver deleted)."""
+    if token_key:
+        cache.delete(_token_cache_key(token_key))
@@ -0,0 +1,92 @@
+"""
+Downsampling helpers for telemetry charts.
+
+A lap sampled at 60Hz has thousands of points per channel, far more than a
+chart a few hundred pixels wide can show. Largest-Triangle-Three-Buckets
+(LTTB) keeps the points that define the visual shape of the line (peaks,
+braking points, gear changes) while dropping the rest.
+"""
+
+import numpy as np
+
+# Points kept per chart trace
+CHART_MAX_POINTS = 2000
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Pick the indices of the points to keep when downsampling a line with LTTB.
+
+    The interior points are split into n_out - 2 buckets and the point in each
+    bucket forming the largest triangle with its neighbours is kept. The left
+    neighbour is the previous bucket's average rather than its selected point,
+    which lets every bucket be scored at once with NumPy instead of in a
+    Python loop; the first and last points are always kept.
+
+    Args:
+        x: 1-D array of x values (e.g. LapDist), ascending
+        y: 1-D array of y values, same length as x
+        n_out: Number of points to keep
+
+    Returns:
+        numpy.ndarray: Sorted indices into x/y (all indices if no downsampling
+        is needed)
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket i covers interior points [starts[i], starts[i + 1])
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    starts = bounds[:-1]
+    counts = np.diff(bounds)
+    bucket_of = np.repeat(np.arange(len(starts)), counts)
+
+    # Bucket averages, padded with the first/last point as outer neighbours
+    x_avg = np.add.reduceat(x[1:-1], starts - 1) / counts
+    y_avg = np.add.reduceat(y[1:-1], starts - 1) / counts
+    left_x = np.concatenate(([x[0]], x_avg[:-1]))[bucket_of]
+    left_y = np.concatenate(([y[0]], y_avg[:-1]))[bucket_of]
+    right_x = np.concatenate((x_avg[1:], [x[-1]]))[bucket_of]
+    right_y = np.concatenate((y_avg[1:], [y[-1]]))[bucket_of]
+
+    # Twice the triangle area for every interior point (the factor doesn't matter)
+    px = x[1:-1]
+    py = y[1:-1]
+    area = np.abs((left_x - right_x) * (py - left_y) - (left_x - px) * (right_y - left_y))
+    area[np.isnan(area)] = -np.inf
+
+    # First point with the largest area in each bucket
+    bucket_max = np.maximum.reduceat(area, starts - 1)
+    _, first = np.unique(bucket_of[area == bucket_max[bucket_of]], return_index=True)
+    picked = np.flatnonzero(area == bucket_max[bucket_of])[first] + 1
+
+    return np.concatenate(([0], picked, [n - 1]))
+
+
+def lttb(x, y, n_out=CHART_MAX_POINTS):
+    """
+    Downsample a line to at most n_out points with LTTB.
+
+    Returns:
+        tuple: (x, y) arrays; the inputs unchanged if already short enough
+    """
+    if len(x) <= n_out:
+        return x, y
+    indices = lttb_indices(x, y, n_out)
+    return x[indices], y[indices]
+
+
+def evenly_spaced_indices(n, n_out):
+    """
+    Pick n_out evenly spaced indices out of n (always including both ends).
+
+    Used when several channels must stay index-aligned, where per-channel LTTB
+    would keep different samples for each channel.
+    """
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, n_out).round().astype(np.intp))
@@ -5,17 +5,24 @@ Provides standardized functions for exporting laps with telemetry data
 and importing them back into the system.
 """
 
-import gzip
-import json
 import logging
-from datetime import datetime
-from decimal import Decimal
+import zlib
+from datetime import UTC, datetime
 
+import orjson
+from asgiref.sync import sync_to_async
+from django.db import transaction
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Size of uncompressed JSON slices fed to the compressor when streaming exports
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# gzip level for .lap.gz files (9 is several times slower for a few % smaller files)
+EXPORT_COMPRESSLEVEL = 6
+
 
 def build_lap_export_data(lap, telemetry):
     """
@@ -28,9 +35,11 @@ def build_lap_export_data(lap, telemetry):
     Returns:
         dict: Export data structure with lap, session, driver, and telemetry data
     """
+    session = lap.session
     export_data = {
         'format_version': '1.0',
-        'exported_at': datetime.utcnow().isoformat() + 'Z',
+        # Same '...Z' format as before; utcnow() is deprecated since Python 3.12
+        'exported_at': datetime.now(UTC).isoformat().replace('+00:00', 'Z'),
         'lap': {
             'lap_number': lap.lap_number,
             'lap_time': float(lap.lap_time),
@@ -40,17 +49,17 @@ def build_lap_export_data(lap, telemetry):
             'is_valid': lap.is_valid,
         },
         'session': {
-            'track_name': lap.session.track.name if lap.session.track else 'Unknown Track',
-            'track_config': lap.session.track.configuration if lap.session.track else '',
-            'car_name': lap.session.car.name if lap.session.car else 'Unknown Car',
-            'session_type': lap.session.session_type,
-            'session_date': lap.session.session_date.isoformat(),
-            'air_temp': float(lap.session.air_temp) if lap.session.air_temp else None,
-            'track_temp': float(lap.session.track_temp) if lap.session.track_temp else None,
-            'weather_type': lap.session.weather_type or '',
+            'track_name': session.track.name if session.track else 'Unknown Track',
+            'track_config': session.track.configuration if session.track else '',
+            'car_name': session.car.name if session.car else 'Unknown Car',
+            'session_type': session.session_type,
+            'session_date': session.session_date.isoformat(),
+            'air_temp': float(session.air_temp) if session.air_temp else None,
+            'track_temp': float(session.track_temp) if session.track_temp else None,
+            'weather_type': session.weather_type or '',
         },
         'driver': {
-            'display_name': lap.session.driver_name or lap.session.driver.username,
+            'display_name': session.driver_name or session.driver.username,
         },
         'telemetry': {
             'sample_count': telemetry.sample_count,
@@ -63,42 +72,121 @@ def build_lap_export_data(lap, telemetry):
     return export_data
 
 
+def _serialize(value):
+    """Serialize a value to compact JSON bytes with orjson."""
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+# Nested objects written member by member rather than serialized whole; the
+# telemetry channels make up nearly all of an export
+_STREAMED_EXPORT_OBJECTS = {'telemetry': {'data': {}}}
+
+
+def _iter_json_object(obj, streamed):
+    """
+    Serialize a dict to JSON, yielding '{', each '"key":value' member and '}'.
+
+    Members named in streamed are written the same way, recursively; all
+    other values are serialized in one piece.
+    """
+    yield b'{'
+    for index, (key, value) in enumerate(obj.items()):
+        yield (b',' if index else b'') + _serialize(key) + b':'
+        if key in streamed and isinstance(value, dict):
+            yield from _iter_json_object(value, streamed[key])
+        else:
+            yield _serialize(value)
+    yield b'}'
+
+
+def _iter_lap_export_json(export_data):
+    """
+    Serialize export data to JSON, yielding it in pieces.
+
+    The telemetry channels are serialized one at a time, so the full JSON
+    document is never held in memory at once.
+
+    Yields:
+        bytes: Consecutive pieces of the JSON document
+    """
+    return _iter_json_object(export_data, _STREAMED_EXPORT_OBJECTS)
+
+
 def compress_lap_export_data(export_data):
     """
     Convert export data to JSON and compress with gzip.
 
+    Uses orjson, which serializes the large telemetry sample lists much
+    faster than the stdlib encoder and returns bytes directly. The JSON is
+    compressed as it is produced, so only the compressed result is kept.
+
     Args:
         export_data: Dictionary containing lap export data
 
     Returns:
         bytes: Gzip-compressed JSON data
     """
-    json_data = json.dumps(export_data, indent=2)
-    compressed_data = gzip.compress(json_data.encode('utf-8'))
+    return b''.join(iter_compressed_lap_export_data(export_data))
 
-    return compressed_data
 
+def iter_compressed_lap_export_data(export_data, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Convert export data to JSON and yield it gzip-compressed in chunks.
 
-def import_lap_from_data(data, user):
+    Streaming counterpart of compress_lap_export_data() for HTTP downloads,
+    so neither the JSON nor the compressed file is held in memory as a whole.
+
+    Args:
+        export_data: Dictionary containing lap export data
+        chunk_size: Number of uncompressed bytes to compress per step
+
+    Yields:
+        bytes: Consecutive pieces of a gzip stream
     """
-    Import a lap from parsed export data structure.
+    # wbits=31 selects the gzip container (same output format as gzip.compress)
+    compressor = zlib.compressobj(EXPORT_COMPRESSLEVEL, zlib.DEFLATED, 31)
 
-    Creates Session, Lap, and TelemetryData objects from the standardized
-    export format. Used by both file upload and protocol import.
+    for piece in _iter_lap_export_json(export_data):
+        piece = memoryview(piece)
+        for offset in range(0, len(piece), chunk_size):
+            chunk = compressor.compress(piece[offset:offset + chunk_size])
+            if chunk:
+                yield chunk
+
+    yield compressor.flush()
+
+
+async def aiter_compressed_lap_export_data(export_data, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Async wrapper around iter_compressed_lap_export_data() for HTTP downloads.
+
+    Under ASGI, StreamingHttpResponse collects a sync iterator into a list
+    before sending anything, so only an async iterator actually streams.
+    Each serialize/compress step runs in a worker thread to keep it off the
+    event loop.
 
     Args:
-        data: Dictionary containing lap export data (format_version 1.0)
-        user: Django User who is importing the lap
+        export_data: Dictionary containing lap export data
+        chunk_size: Number of uncompressed bytes to compress per step
+
+    Yields:
+        bytes: Consecutive pieces of a gzip stream
+    """
+    chunks = iter_compressed_lap_export_data(export_data, chunk_size)
+    next_chunk = sync_to_async(next, thread_sensitive=False)
+
+    # next() with a default, since StopIteration can't cross the await
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
 
-    Returns:
-        Lap: The created Lap object
+
+def _validate_import_data(data):
+    """
+    Validate the top-level structure of parsed export data.
 
     Raises:
         ValueError: If data format is invalid or missing required fields
     """
-    # Import models here to avoid circular imports
-    from ..models import Session, Lap, TelemetryData, Track, Car
-
     # Validate format version
     if data.get('format_version') != '1.0':
         raise ValueError(f"Unsupported format version: {data.get('format_version')}")
@@ -109,22 +197,95 @@ def import_lap_from_data(data, user):
         if field not in data:
             raise ValueError(f"Invalid data format: missing '{field}' field")
 
-    # Get or create Track
-    track_name = data['session'].get('track_name', 'Unknown Track')
-    track_config = data['session'].get('track_config', '')
-    track, _ = Track.objects.get_or_create(
-        name=track_name,
-        configuration=track_config,
-        defaults={'name': track_name, 'configuration': track_config, 'background_image_url': ''}
-    )
 
-    # Get or create Car
-    car_name = data['session'].get('car_name', 'Unknown Car')
-    car, _ = Car.objects.get_or_create(
-        name=car_name,
-        defaults={'name': car_name, 'image_url': ''}
+def _track_key(data):
+    """Return the (name, configuration) Track key for export data."""
+    return (
+        data['session'].get('track_name', 'Unknown Track'),
+        data['session'].get('track_config', ''),
     )
 
+
+def _car_key(data):
+    """Return the Car name for export data."""
+    return data['session'].get('car_name', 'Unknown Car')
+
+
+def _resolve_tracks_and_cars(data_list):
+    """
+    Look up (and create where missing) the Tracks and Cars for export data.
+
+    Resolves every distinct track/car in a single SELECT per model, inserts
+    the missing ones with one bulk_create(ignore_conflicts=True), and reads
+    those back, instead of a get_or_create() per lap.
+
+    Args:
+        data_list: List of validated export data dictionaries
+
+    Returns:
+        tuple: ({(name, configuration): Track}, {name: Car})
+    """
+    from ..models import Track, Car
+
+    track_keys = {_track_key(data) for data in data_list}
+    car_names = {_car_key(data) for data in data_list}
+
+    track_names = {name for name, _ in track_keys}
+    tracks = {
+        (track.name, track.configuration): track
+        for track in Track.objects.filter(name__in=track_names)
+        if (track.name, track.configuration) in track_keys
+    }
+    missing_tracks = track_keys - tracks.keys()
+    if missing_tracks:
+        Track.objects.bulk_create(
+            [Track(name=name, configuration=config, background_image_url='')
+             for name, config in missing_tracks],
+            ignore_conflicts=True
+        )
+        tracks.update(
+            ((track.name, track.configuration), track)
+            for track in Track.objects.filter(name__in={name for name, _ in missing_tracks})
+            if (track.name, track.configuration) in missing_tracks
+        )
+
+    cars = Car.objects.in_bulk(car_names, field_name='name')
+    missing_cars = car_names - cars.keys()
+    if missing_cars:
+        Car.objects.bulk_create(
+            [Car(name=name, image_url='') for name in missing_cars],
+            ignore_conflicts=True
+        )
+        cars.update(Car.objects.in_bulk(missing_cars, field_name='name'))
+
+    return tracks, cars
+
+
+def _decimal_value(model, field_name, value):
+    """
+    Convert an imported number to a Decimal for a model DecimalField.
+
+    Uses the field's own to_python(), which converts floats with
+    Decimal.create_decimal_from_float() at the field's precision instead of
+    formatting them to a string and re-parsing it.
+    """
+    if value is None:
+        return None
+    return model._meta.get_field(field_name).to_python(value)
+
+
+def _build_import_objects(data, user, track, car):
+    """
+    Build unsaved Session, Lap and TelemetryData instances from export data.
+
+    The Lap and TelemetryData foreign keys are assigned by the caller once
+    the parent rows have primary keys.
+
+    Returns:
+        tuple: (Session, Lap, TelemetryData) model instances
+    """
+    from ..models import Session, Lap, TelemetryData
+
     # Parse session date
     try:
         session_date = parse_datetime(data['session']['session_date'])
@@ -134,8 +295,7 @@ def import_lap_from_data(data, user):
         logger.debug("Could not parse session date, using current time: %s", e)
         session_date = timezone.now()
 
-    # Create Session
-    session = Session.objects.create(
+    session = Session(
         driver=user,
         team=user.driver_profile.default_team if hasattr(user, 'driver_profile') else None,
         track=track,
@@ -143,32 +303,64 @@ def import_lap_from_data(data, user):
         session_type='imported',
         session_date=session_date,
         processing_status='completed',
-        air_temp=Decimal(str(data['session']['air_temp'])) if data['session'].get('air_temp') is not None else None,
-        track_temp=Decimal(str(data['session']['track_temp'])) if data['session'].get('track_temp') is not None else None,
+        air_temp=_decimal_value(Session, 'air_temp', data['session'].get('air_temp')),
+        track_temp=_decimal_value(Session, 'track_temp', data['session'].get('track_temp')),
         weather_type=data['session'].get('weather_type', ''),
         is_public=False,
     )
 
-    # Create Lap
     lap_data = data['lap']
-    lap = Lap.objects.create(
-        session=session,
+    lap = Lap(
         lap_number=lap_data.get('lap_number', 1),
-        lap_time=Decimal(str(lap_data['lap_time'])),
-        sector1_time=Decimal(str(lap_data['sector1_time'])) if lap_data.get('sector1_time') is not None else None,
-        sector2_time=Decimal(str(lap_data['sector2_time'])) if lap_data.get('sector2_time') is not None else None,
-        sector3_time=Decimal(str(lap_data['sector3_time'])) if lap_data.get('sector3_time') is not None else None,
+        lap_time=_decimal_value(Lap, 'lap_time', lap_data['lap_time']),
+        sector1_time=_decimal_value(Lap, 'sector1_time', lap_data.get('sector1_time')),
+        sector2_time=_decimal_value(Lap, 'sector2_time', lap_data.get('sector2_time')),
+        sector3_time=_decimal_value(Lap, 'sector3_time', lap_data.get('sector3_time')),
         is_valid=lap_data.get('is_valid', True),
     )
 
-    # Create TelemetryData
     telemetry_data = data['telemetry']
-    TelemetryData.objects.create(
-        lap=lap,
+    telemetry = TelemetryData(
         data=telemetry_data['data'],
         sample_count=telemetry_data.get('sample_count', len(telemetry_data['data'].get('Distance', []))),
-        max_speed=Decimal(str(telemetry_data['max_speed'])) if telemetry_data.get('max_speed') is not None else None,
-        avg_speed=Decimal(str(telemetry_data['avg_speed'])) if telemetry_data.get('avg_speed') is not None else None,
+        max_speed=_decimal_value(TelemetryData, 'max_speed', telemetry_data.get('max_speed')),
+        avg_speed=_decimal_value(TelemetryData, 'avg_speed', telemetry_data.get('avg_speed')),
     )
 
+    return session, lap, telemetry
+
+
+@transaction.atomic
+def import_lap_from_data(data, user):
+    """
+    Import a lap from parsed export data structure.
+
+    Creates Session, Lap, and TelemetryData objects from the standardized
+    export format inside a single transaction. Used by both file upload and
+    protocol import.
+
+    Args:
+        data: Dictionary containing lap export data (format_version 1.0)
+        user: Django User who is importing the lap
+
+    Returns:
+        Lap: The created Lap object
+
+    Raises:
+        ValueError: If data format is invalid or missing required fields
+    """
+    _validate_import_data(data)
+
+    tracks, cars = _resolve_tracks_and_cars([data])
+    session, lap, telemetry = _build_import_objects(
+        data, user, tracks[_track_key(data)], cars[_car_key(data)]
+    )
+
+    session.save()
+    lap.session = session
+    lap.save()
+    telemetry.lap = lap
+    telemetry.save()
+
     return lap
+
@@ -0,0 +1,100 @@
+"""
+Track/car filter option helpers.
+
+The track and car dropdowns on the session list, analysis dashboard and
+leaderboards only change when a session is uploaded, processed, reassigned
+or deleted (or loses its laps), so the option lists are cached and
+invalidated from the Session and Lap signals (see telemetry/signals.py).
+Those usually fire in the Celery worker (parse_ibt_file), so this relies on
+the cache being shared with the web process (Redis, see CACHES).
+"""
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+# Seconds to keep a user's filter options cached
+FILTER_OPTIONS_CACHE_TIMEOUT = 300
+
+# Seconds to keep the global leaderboard filter options cached
+LEADERBOARD_FILTER_OPTIONS_CACHE_TIMEOUT = 600
+
+LEADERBOARD_FILTER_CACHE_KEYS = ('leaderboard:tracks', 'leaderboard:cars')
+
+
+def _user_filter_cache_keys(user_id):
+    """Return the (tracks, cars) cache keys for a user."""
+    return f'user:{user_id}:tracks', f'user:{user_id}:cars'
+
+
+def get_user_filter_options(user):
+    """
+    Get the tracks and cars a user has driven, for filter dropdowns.
+
+    Uses an EXISTS subquery per track/car instead of a JOIN + DISTINCT across
+    the sessions table, and caches the resulting lists per user.
+
+    Args:
+        user: Django User whose sessions define the options
+
+    Returns:
+        tuple: (tracks, cars) lists ordered by the models' default ordering
+    """
+    from ..models import Session, Track, Car
+
+    tracks_key, cars_key = _user_filter_cache_keys(user.pk)
+
+    tracks = cache.get_or_set(
+        tracks_key,
+        lambda: list(Track.objects.filter(
+            Exists(Session.objects.filter(driver=user, track=OuterRef('pk')))
+        )),
+        FILTER_OPTIONS_CACHE_TIMEOUT
+    )
+    cars = cache.get_or_set(
+        cars_key,
+        lambda: list(Car.objects.filter(
+            Exists(Session.objects.filter(driver=user, car=OuterRef('pk')))
+        )),
+        FILTER_OPTIONS_CACHE_TIMEOUT
+    )
+
+    return tracks, cars
+
+
+def invalidate_user_filter_options(user_id):
+    """Drop a user's cached filter options (called when their sessions change)."""
+    cache.delete_many(_user_filter_cache_keys(user_id))
+
+
+def get_leaderboard_filter_options():
+    """
+    Get every track and car that has at least one lap, for leaderboard filters.
+
+    Returns:
+        tuple: (tracks, cars) lists ordered by name
+    """
+    from ..models import Lap, Track, Car
+
+    tracks_key, cars_key = LEADERBOARD_FILTER_CACHE_KEYS
+
+    tracks = cache.get_or_set(
+        tracks_key,
+        lambda: list(Track.objects.filter(
+            Exists(Lap.objects.filter(session__track=OuterRef('pk')))
+        ).order_by('name')),
+        LEADERBOARD_FILTER_OPTIONS_CACHE_TIMEOUT
+    )
+    cars = cache.get_or_set(
+        cars_key,
+        lambda: list(Car.objects.filter(
+            Exists(Lap.objects.filter(session__car=OuterRef('pk')))
+        ).order_by('name')),
+        LEADERBOARD_FILTER_OPTIONS_CACHE_TIMEOUT
+    )
+
+    return tracks, cars
+
+
+def invalidate_leaderboard_filter_options():
+    """Drop the cached leaderboard filter options (called when sessions change)."""
+    cache.delete_many(LEADERBOARD_FILTER_CACHE_KEYS)
@@ -37,9 +37,11 @@ from .api import (
 
 # Import utility functions from utils package
 from ..utils.export import (
+    aiter_compressed_lap_export_data,
     build_lap_export_data,
     compress_lap_export_data,
     import_lap_from_data,
+    iter_compressed_lap_export_data,
 )
 
 # Import remaining views from views_main.py (to be split into their own modules)
@@ -63,9 +65,11 @@ from ..views_main import (
 __all__ = [
     # Helper functions
     'api_token_required',
+    'aiter_compressed_lap_export_data',
     'build_lap_export_data',
     'compress_lap_export_data',
     'import_lap_from_data',
+    'iter_compressed_lap_export_data',
 
     # Team views (from teams.py)
     'team_list',
@@ -5,7 +5,8 @@ API authentication views and decorators.
 from functools import wraps
 from django.http import JsonResponse
 
-from ...models import Driver, Session
+from ...models import Session
+from ...utils.api_tokens import get_user_for_api_token, is_valid_token_format
 
 
 def api_token_required(view_func):
@@ -33,24 +34,24 @@ def api_token_required(view_func):
                 'error': 'Missing or invalid Authorization header'
             }, status=401)
 
-        token_key = auth_header.replace('Token ', '').strip()
+        token_key = auth_header[6:].strip()
 
-        # Validate token format (UUIDs are at least 32 chars)
-        if not token_key or len(token_key) < 32:
+        # Validate token format before touching the database
+        if not is_valid_token_format(token_key):
             return JsonResponse({
                 'error': 'Invalid token format'
             }, status=401)
 
-        # Find driver by API token
-        try:
-            driver_profile = Driver.objects.select_related('user').get(api_token=token_key)
-            # Set the authenticated user on the request
-            request.user = driver_profile.user
-        except Driver.DoesNotExist:
+        # Find the user owning this API token
+        user = get_user_for_api_token(token_key)
+        if user is None:
             return JsonResponse({
                 'error': 'Invalid API token'
             }, status=401)
 
+        # Set the authenticated user on the request
+        request.user = user
+
         # Call the original view function
         return view_func(request, *args, **kwargs)
 
@@ -71,6 +72,6 @@ def api_auth_test(request):
         'authenticated': True,
         'username': request.user.username,
         'email': request.user.email,
-        'sessions_count': Session.objects.filter(driver=request.user).count(),
+        'sessions_count': Session.objects.filter(driver_id=request.user.id).count(),
         'server_url': f"{request.scheme}://{request.get_host()}"
     })
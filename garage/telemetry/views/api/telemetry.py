@@ -2,21 +2,137 @@
 API endpoints for telemetry data access and chart generation.
 """
 
+import hashlib
 import json
 import logging
 
 import numpy as np
 import plotly.graph_objects as go
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from plotly.subplots import make_subplots
 
-from ...models import Lap, Team
+from ...models import Lap, Team, TelemetryData
+from ...utils.downsample import CHART_MAX_POINTS, evenly_spaced_indices, lttb
 
 logger = logging.getLogger(__name__)
 
+# Seconds to keep a generated comparison chart cached
+CHART_CACHE_TIMEOUT = 3600
+
+# Channels each subplot needs, keyed by subplot (channel) name
+CHANNEL_GROUPS = {
+    'delta': frozenset({'LapDist', 'SessionTime'}),  # For time delta calculation
+    'Speed': frozenset({'Speed', 'LapDist'}),
+    'Throttle': frozenset({'Throttle', 'LapDist'}),
+    'Brake': frozenset({'Brake', 'LapDist'}),
+    'Clutch': frozenset({'Clutch', 'LapDist'}),
+    'Gear': frozenset({'Gear', 'LapDist'}),
+    'RPM': frozenset({'RPM', 'LapDist'}),
+    'SteeringWheelAngle': frozenset({'SteeringWheelAngle', 'LapDist'}),
+    # Tire Temperatures
+    'LFtempL': frozenset({'LFtempL', 'LapDist'}),
+    'LFtempM': frozenset({'LFtempM', 'LapDist'}),
+    'LFtempR': frozenset({'LFtempR', 'LapDist'}),
+    'RFtempL': frozenset({'RFtempL', 'LapDist'}),
+    'RFtempM': frozenset({'RFtempM', 'LapDist'}),
+    'RFtempR': frozenset({'RFtempR', 'LapDist'}),
+    'LRtempL': frozenset({'LRtempL', 'LapDist'}),
+    'LRtempM': frozenset({'LRtempM', 'LapDist'}),
+    'LRtempR': frozenset({'LRtempR', 'LapDist'}),
+    'RRtempL': frozenset({'RRtempL', 'LapDist'}),
+    'RRtempM': frozenset({'RRtempM', 'LapDist'}),
+    'RRtempR': frozenset({'RRtempR', 'LapDist'}),
+    # Tire Pressures
+    'LFcoldPressure': frozenset({'LFcoldPressure', 'LapDist'}),
+    'RFcoldPressure': frozenset({'RFcoldPressure', 'LapDist'}),
+    'LRcoldPressure': frozenset({'LRcoldPressure', 'LapDist'}),
+    'RRcoldPressure': frozenset({'RRcoldPressure', 'LapDist'}),
+    # Suspension - Ride Heights
+    'LFrideHeight': frozenset({'LFrideHeight', 'LapDist'}),
+    'RFrideHeight': frozenset({'RFrideHeight', 'LapDist'}),
+    'LRrideHeight': frozenset({'LRrideHeight', 'LapDist'}),
+    'RRrideHeight': frozenset({'RRrideHeight', 'LapDist'}),
+    # Suspension - Shock Deflection
+    'LFshockDefl': frozenset({'LFshockDefl', 'LapDist'}),
+    'RFshockDefl': frozenset({'RFshockDefl', 'LapDist'}),
+    'LRshockDefl': frozenset({'LRshockDefl', 'LapDist'}),
+    'RRshockDefl': frozenset({'RRshockDefl', 'LapDist'}),
+    # Suspension - Shock Velocity
+    'LFshockVel': frozenset({'LFshockVel', 'LapDist'}),
+    'RFshockVel': frozenset({'RFshockVel', 'LapDist'}),
+    'LRshockVel': frozenset({'LRshockVel', 'LapDist'}),
+    'RRshockVel': frozenset({'RRshockVel', 'LapDist'}),
+    # Acceleration / G-Forces
+    'LatAccel': frozenset({'LatAccel', 'LapDist'}),
+    'LongAccel': frozenset({'LongAccel', 'LapDist'}),
+    'VertAccel': frozenset({'VertAccel', 'LapDist'}),
+    # Orientation
+    'Roll': frozenset({'Roll', 'LapDist'}),
+    'Pitch': frozenset({'Pitch', 'LapDist'}),
+    'Yaw': frozenset({'Yaw', 'LapDist'}),
+    'RollRate': frozenset({'RollRate', 'LapDist'}),
+    'PitchRate': frozenset({'PitchRate', 'LapDist'}),
+    'YawRate': frozenset({'YawRate', 'LapDist'}),
+    # Fuel
+    'FuelLevel': frozenset({'FuelLevel', 'LapDist'}),
+    'FuelLevelPct': frozenset({'FuelLevelPct', 'LapDist'}),
+}
+
+
+def _shares_team(user_a, user_b):
+    """Return True if the two users are members of at least one common team."""
+    return Team.objects.filter(members=user_a).filter(members=user_b).exists()
+
+
+def _teammate_ids(user, driver_ids):
+    """Return the subset of driver_ids sharing at least one team with user."""
+    User = get_user_model()
+    return set(User.objects.filter(
+        id__in=driver_ids, teams__members=user
+    ).values_list('id', flat=True))
+
+
+def _chart_cache_key(laps, selected_channels, lap_colors):
+    """
+    Build the cache key for a comparison chart.
+
+    Keyed on the laps the user is allowed to see (in request order, which
+    decides colors), their telemetry row and sample count (which change when
+    a session is reprocessed or optimized), the driver username and lap time
+    shown in the trace names, the channels and the colors.
+    """
+    lap_versions = [
+        (
+            lap.id,
+            lap.session.driver.username,
+            str(lap.lap_time),
+            *((lap.telemetry.id, lap.telemetry.sample_count) if hasattr(lap, 'telemetry') else (None, None)),
+        )
+        for lap in laps
+    ]
+    payload = json.dumps({
+        'laps': lap_versions,
+        'channels': selected_channels,
+        'colors': lap_colors,
+    }, sort_keys=True)
+    return 'chartjson:' + hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _with_telemetry_cache_headers(response, etag):
+    """Tag a lap telemetry response so browsers revalidate it with If-None-Match."""
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 
 @login_required
 def api_lap_telemetry(request, lap_id):
@@ -27,58 +143,102 @@ def api_lap_telemetry(request, lap_id):
     Args:
         lap_id: The ID of the lap to fetch telemetry for
 
+    Query parameters:
+        max_points: Optional cap on samples per channel (evenly thinned)
+
     Returns:
         JSON with lap metadata and telemetry data
     """
     try:
-        lap = get_object_or_404(Lap, id=lap_id)
+        # Lap, session, driver, track, car and the telemetry row in one query;
+        # the telemetry blob itself is deferred until the ETag check misses
+        lap = get_object_or_404(
+            Lap.objects.select_related(
+                'session__driver', 'session__track', 'session__car', 'telemetry'
+            ).defer('telemetry__data'),
+            id=lap_id
+        )
+        session = lap.session
 
         # Check if user has permission to view this lap
         # Allow if: user owns the session, or user shares a team with the session's driver
-        if lap.session.driver != request.user:
-            # Check if user and driver share any team membership
-            # Get team IDs for both users and check for intersection
-            user_team_ids = set(Team.objects.filter(members=request.user).values_list('id', flat=True))
-            driver_team_ids = set(Team.objects.filter(members=lap.session.driver).values_list('id', flat=True))
-            shared_teams = user_team_ids & driver_team_ids
-            driver_in_user_teams = len(shared_teams) > 0
-
-            if not driver_in_user_teams:
+        if session.driver != request.user:
+            if not _shares_team(request.user, session.driver):
                 return JsonResponse({
                     'error': 'You do not have permission to view this lap',
                     'debug': {
                         'request_user': request.user.username,
                         'request_user_id': request.user.id,
-                        'lap_driver': lap.session.driver.username,
-                        'lap_driver_id': lap.session.driver.id,
-                        'user_team_ids': list(user_team_ids),
-                        'driver_team_ids': list(driver_team_ids),
-                        'shared_teams': list(shared_teams),
+                        'lap_driver': session.driver.username,
+                        'lap_driver_id': session.driver.id,
                     }
                 }, status=403)
 
-        # Get telemetry data
-        telemetry = lap.telemetry
-        if not telemetry:
+        try:
+            max_points = int(request.GET.get('max_points', 0))
+        except ValueError:
+            return JsonResponse({'error': 'max_points must be an integer'}, status=400)
+
+        # Version the response without loading the telemetry blob. The tag covers
+        # the telemetry row (replaced on reprocessing) and its sample_count
+        # (thinned by optimize_telemetry), session.updated_at (session date),
+        # track/car updated_at (their names), the lap fields and driver username
+        # in the body, and max_points. Hashed so the username can't put
+        # arbitrary characters in the header
+        if not hasattr(lap, 'telemetry'):
             return JsonResponse({
                 'error': 'No telemetry data available for this lap'
             }, status=404)
-
-        return JsonResponse({
+        telemetry = lap.telemetry
+        version = json.dumps([
+            telemetry.id,
+            telemetry.sample_count,
+            session.updated_at.timestamp(),
+            session.track.updated_at.timestamp() if session.track else 0,
+            session.car.updated_at.timestamp() if session.car else 0,
+            lap.lap_number,
+            str(lap.lap_time),
+            lap.is_valid,
+            session.driver.username,
+            max_points,
+        ])
+        etag = quote_etag(hashlib.blake2b(version.encode(), digest_size=16).hexdigest())
+
+        # Checked only after the permission check above, so a 304 is never
+        # returned for a lap the user cannot see
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return _with_telemetry_cache_headers(not_modified, etag)
+
+        # Get telemetry data (loads the deferred blob)
+        telemetry_data = telemetry.data
+        if max_points > 0:
+            # Thin every channel with the same indices so samples stay aligned
+            # across channels (the map pairs Lat/Lon/LapDist by index)
+            sample_count = len(telemetry_data.get('LapDist', []))
+            indices = evenly_spaced_indices(sample_count, max_points).tolist()
+            if len(indices) < sample_count:
+                telemetry_data = {
+                    channel: [values[i] for i in indices]
+                    if isinstance(values, list) and len(values) == sample_count else values
+                    for channel, values in telemetry_data.items()
+                }
+
+        return _with_telemetry_cache_headers(JsonResponse({
             'success': True,
             'lap': {
                 'id': lap.id,
                 'lap_number': lap.lap_number,
                 'lap_time': lap.lap_time,
-                'driver': lap.session.driver.username,
-                'track': lap.session.track.name if lap.session.track else 'Unknown',
-                'track_id': lap.session.track.id if lap.session.track else None,
-                'car': lap.session.car.name if lap.session.car else 'Unknown',
-                'car_id': lap.session.car.id if lap.session.car else None,
-                'session_date': lap.session.session_date.isoformat() if lap.session.session_date else None,
+                'driver': session.driver.username,
+                'track': session.track.name if session.track else 'Unknown',
+                'track_id': session.track.id if session.track else None,
+                'car': session.car.name if session.car else 'Unknown',
+                'car_id': session.car.id if session.car else None,
+                'session_date': session.session_date.isoformat() if session.session_date else None,
             },
-            'telemetry': telemetry.data,  # All channel data
-        })
+            'telemetry': telemetry_data,  # All channel data
+        }), etag)
 
     except Exception as e:
         logger.exception("Error fetching lap telemetry: %s", e)
@@ -119,8 +279,9 @@ def api_fastest_laps(request):
             session__car_id=car_id,
             is_valid=True,
             lap_time__gt=0  # Exclude incomplete laps
-        ).select_related(
-            'session', 'session__track', 'session__car', 'session__driver'
+        ).select_related('session').only(
+            'id', 'lap_number', 'lap_time', 'is_personal_best',
+            'session__id', 'session__session_type', 'session__session_date',
         ).order_by('lap_time')[:limit]
 
         user_laps_data = [{
@@ -136,41 +297,43 @@ def api_fastest_laps(request):
         # Get teammates' fastest laps if requested
         teammate_laps_data = []
         if include_team:
-            # Find teams user belongs to
-            user_teams = Team.objects.filter(members=request.user)
-
-            if user_teams.exists():
-                # Get teammates (excluding current user)
-                User = get_user_model()
-                teammates = User.objects.filter(
-                    teams__in=user_teams
-                ).exclude(id=request.user.id).distinct()
-
-                # Get each teammate's best lap for this track/car
-                for teammate in teammates:
-                    best_lap = Lap.objects.filter(
-                        session__driver=teammate,
-                        session__track_id=track_id,
-                        session__car_id=car_id,
-                        is_valid=True,
-                        lap_time__gt=0  # Exclude incomplete laps
-                    ).select_related(
-                        'session', 'session__track', 'session__car', 'session__driver'
-                    ).order_by('lap_time').first()
-
-                    if best_lap:
-                        teammate_laps_data.append({
-                            'id': best_lap.id,
-                            'lap_number': best_lap.lap_number,
-                            'lap_time': best_lap.lap_time,
-                            'driver': teammate.username,
-                            'session_id': best_lap.session.id,
-                            'session_type': best_lap.session.session_type or 'Unknown',
-                            'session_date': best_lap.session.session_date.isoformat() if best_lap.session.session_date else None,
-                        })
-
-                # Sort by lap time
-                teammate_laps_data.sort(key=lambda x: x['lap_time'])
+            # Teammates are everyone sharing a team with the user (excluding themselves)
+            User = get_user_model()
+            teammate_ids = User.objects.filter(
+                teams__members=request.user
+            ).exclude(id=request.user.id).values('id')
+
+            # Rank each teammate's laps and keep only their best one, in a single query
+            best_laps = Lap.objects.filter(
+                session__driver_id__in=teammate_ids,
+                session__track_id=track_id,
+                session__car_id=car_id,
+                is_valid=True,
+                lap_time__gt=0  # Exclude incomplete laps
+            ).annotate(
+                driver_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('session__driver_id')],
+                    order_by=[F('lap_time').asc(), F('id').asc()],
+                )
+            ).filter(driver_rank=1).select_related('session__driver').only(
+                'id', 'lap_number', 'lap_time',
+                'session__id', 'session__session_type', 'session__session_date',
+                'session__driver__username',
+            )
+
+            teammate_laps_data = [{
+                'id': best_lap.id,
+                'lap_number': best_lap.lap_number,
+                'lap_time': best_lap.lap_time,
+                'driver': best_lap.session.driver.username,
+                'session_id': best_lap.session.id,
+                'session_type': best_lap.session.session_type or 'Unknown',
+                'session_date': best_lap.session.session_date.isoformat() if best_lap.session.session_date else None,
+            } for best_lap in best_laps]
+
+            # Sort by lap time
+            teammate_laps_data.sort(key=lambda x: x['lap_time'])
 
         return JsonResponse({
             'success': True,
@@ -191,8 +354,266 @@ def api_fastest_laps(request):
         }, status=500)
 
 
+def _get_chart_laps(user, lap_ids):
+    """
+    Fetch the requested laps the user may view, in request order.
+
+    Laps that don't exist or belong to a driver the user shares no team with
+    are skipped. The telemetry JSON itself is left unloaded so a cached chart
+    never reads it; see _load_chart_telemetry().
+    """
+    laps_by_id = Lap.objects.select_related(
+        'session__driver', 'telemetry'
+    ).only(
+        'id', 'lap_time', 'session__driver__username',
+        'telemetry__id', 'telemetry__sample_count',
+    ).in_bulk(lap_ids)
+
+    # Check permissions - allow if user owns session or shares a team with driver.
+    # All other drivers are checked together in one query.
+    other_driver_ids = {lap.session.driver_id for lap in laps_by_id.values()} - {user.id}
+    allowed_driver_ids = {user.id}
+    if other_driver_ids:
+        allowed_driver_ids |= _teammate_ids(user, other_driver_ids)
+
+    # Keep the client's lap order (colors are assigned by position)
+    laps = []
+    for lap_id in lap_ids:
+        lap = laps_by_id.get(int(lap_id))
+        if lap and lap.session.driver_id in allowed_driver_ids:
+            laps.append(lap)
+
+    return laps
+
+
+def _load_chart_telemetry(laps):
+    """Fill in the telemetry data of the chart laps with one query (cache misses only)."""
+    telemetries = [lap.telemetry for lap in laps if hasattr(lap, 'telemetry')]
+    data_by_id = dict(
+        TelemetryData.objects.filter(
+            id__in=[telemetry.id for telemetry in telemetries]
+        ).values_list('id', 'data')
+    )
+    for telemetry in telemetries:
+        telemetry.data = data_by_id.get(telemetry.id)
+
+
+def _build_chart(laps, selected_channels, lap_colors):
+    """
+    Build the comparison chart for already fetched laps.
+
+    Pure CPU work (NumPy, Plotly, JSON encoding) with no database access, so
+    it can run off the request thread.
+
+    Returns:
+        tuple: (response dict, HTTP status)
+    """
+    # Color palette (hot to cold: Red, Orange, Yellow, Green, Blue)
+    default_colors = ['#FF0000', '#FF8C00', '#FFD700', '#00FF00', '#00BFFF']
+
+    # Extract telemetry data
+    lap_data = []
+    for i, lap in enumerate(laps):
+        telemetry = lap.telemetry
+        if telemetry and telemetry.data:
+            # Use client-provided color if available, otherwise use default palette
+            if lap_colors and i < len(lap_colors):
+                color = lap_colors[i]
+            else:
+                color = default_colors[i % len(default_colors)]
+
+            lap_data.append({
+                'lap': lap,
+                'telemetry': telemetry,
+                'data': telemetry.data,
+                'color': color,
+                'name': f"{lap.session.driver.username} - {lap.lap_time:.3f}s"
+            })
+
+    if not lap_data:
+        return {'error': 'No telemetry data available'}, 404
+
+    # Determine subplots to create
+    subplots = []
+    subplot_titles = []
+
+    # Always include delta if comparing multiple laps
+    if len(lap_data) > 1:
+        subplots.append('delta')
+        subplot_titles.append('Time Delta vs Fastest Lap')
+
+    # Add selected channels
+    for channel in selected_channels:
+        if channel in CHANNEL_GROUPS:
+            # Check if first lap has this channel
+            if lap_data[0]['data'].keys() >= CHANNEL_GROUPS[channel]:
+                subplots.append(channel)
+                # Format channel name for display
+                display_name = channel.replace('Wheel', ' Wheel').replace('Accel', ' Accel')
+                subplot_titles.append(display_name)
+
+    if not subplots:
+        return {'error': 'No valid channels to display'}, 400
+
+    # Create subplots (no titles to save space - lap info shown above in UI)
+    fig = make_subplots(
+        rows=len(subplots),
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.02,
+        subplot_titles=[],  # Remove titles to save space
+        row_heights=[350] * len(subplots)
+    )
+
+    # Sort laps by lap time for delta calculation
+    fastest_lap = min(lap_data, key=lambda x: x['lap'].lap_time)
+
+    # Add traces for each subplot
+    for row_idx, subplot_type in enumerate(subplots, start=1):
+        if subplot_type == 'delta' and len(lap_data) > 1:
+            # Convert the reference (fastest) lap once, not once per compared lap.
+            # Times stay float64: SessionTime can be thousands of seconds, and
+            # float32 would cost the millisecond precision the delta relies on.
+            fastest_distance = np.asarray(fastest_lap['data'].get('LapDist', []), dtype=np.float64)
+            fastest_time = np.asarray(fastest_lap['data'].get('SessionTime', []), dtype=np.float64)
+            has_reference = len(fastest_distance) > 0 and len(fastest_time) > 0
+            if has_reference:
+                # Normalize time to start from 0 (relative lap time)
+                fastest_time = fastest_time - fastest_time[0]
+                fastest_max_distance = fastest_distance.max()
+
+            # Calculate time delta for each lap vs fastest
+            for lap_info in (lap_data if has_reference else []):
+                try:
+                    # Get distance and time arrays
+                    distance = np.asarray(lap_info['data'].get('LapDist', []), dtype=np.float64)
+                    time = np.asarray(lap_info['data'].get('SessionTime', []), dtype=np.float64)
+
+                    if len(distance) == 0:
+                        continue
+
+                    # Normalize time to start from 0 for each lap (relative lap time)
+                    time = time - time[0]
+
+                    # Interpolate to common distance points
+                    common_distance = np.linspace(0, min(distance.max(), fastest_max_distance), 500)
+                    interp_time = np.interp(common_distance, distance, time)
+                    interp_fastest_time = np.interp(common_distance, fastest_distance, fastest_time)
+
+                    # Calculate delta (positive = slower, negative = faster)
+                    delta = interp_time - interp_fastest_time
+
+                    # Choose line style based on whether this is the fastest lap
+                    line_style = dict(color=lap_info['color'], width=1)
+                    if lap_info == fastest_lap:
+                        # Fastest lap shows as baseline (delta = 0)
+                        line_style['dash'] = 'dot'
+
+                    fig.add_trace(
+                        go.Scattergl(
+                            x=common_distance,
+                            y=delta,
+                            name=lap_info['name'],
+                            line=line_style,
+                            hovertemplate='Distance: %{x:.1f}m<br>Delta: %{y:+.3f}s<extra></extra>'
+                        ),
+                        row=row_idx,
+                        col=1
+                    )
+                except (ValueError, IndexError) as e:
+                    logger.warning("Error calculating delta: %s", e)
+
+            # Update y-axis for delta
+            fig.update_yaxes(title_text="Time Delta (s)", row=row_idx, col=1)
+
+        else:
+            # Regular channel subplot
+            required_channels = CHANNEL_GROUPS.get(subplot_type, frozenset())
+
+            for lap_info in lap_data:
+                try:
+                    # Check if lap has required channels
+                    if not lap_info['data'].keys() >= required_channels:
+                        continue
+
+                    x_data = lap_info['telemetry'].channel_array('LapDist')
+                    y_data = lap_info['telemetry'].channel_array(subplot_type)
+
+                    if len(x_data) == 0 or len(y_data) == 0:
+                        continue
+
+                    # Truncate to shortest length
+                    min_len = min(len(x_data), len(y_data))
+                    x_data = x_data[:min_len]
+                    y_data = y_data[:min_len]
+
+                    # Keep only the points that shape the line (LTTB)
+                    x_data, y_data = lttb(x_data, y_data, CHART_MAX_POINTS)
+
+                    # Convert units for better readability
+                    if subplot_type == 'Speed':
+                        # Convert Speed from m/s to km/h
+                        y_data = y_data * np.float32(3.6)
+                    elif subplot_type in ['Throttle', 'Brake', 'Clutch']:
+                        # Convert from 0-1 to 0-100%
+                        y_data = y_data * np.float32(100)
+                    elif subplot_type == 'Gear':
+                        # Filter out gear 0 (neutral) for cleaner display
+                        y_data = np.where(y_data > 0, y_data, np.nan)
+
+                    fig.add_trace(
+                        go.Scattergl(
+                            x=x_data,
+                            y=y_data,
+                            name=lap_info['name'],
+                            line=dict(color=lap_info['color'], width=1),
+                            hovertemplate=f'Distance: %{{x:.1f}}m<br>{subplot_type}: %{{y:.2f}}<extra></extra>',
+                            connectgaps=True  # Connect line segments across NaN values (for Gear)
+                        ),
+                        row=row_idx,
+                        col=1
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning("Error adding trace for %s: %s", subplot_type, e)
+
+            # Update y-axis label with proper units
+            y_label = subplot_type
+            if subplot_type == 'Speed':
+                y_label = 'Speed (km/h)'
+            elif subplot_type in ['Throttle', 'Brake', 'Clutch']:
+                y_label = f'{subplot_type} (%)'
+                # Set fixed range for percentage inputs (0-100%)
+                fig.update_yaxes(title_text=y_label, range=[0, 100], row=row_idx, col=1)
+                continue  # Skip the default update below
+
+            fig.update_yaxes(title_text=y_label, row=row_idx, col=1)
+
+    # Update x-axis (only bottom subplot)
+    fig.update_xaxes(title_text="Distance (m)", row=len(subplots), col=1)
+
+    # Update layout
+    fig.update_layout(
+        height=350 * len(subplots),
+        hovermode='x unified',
+        template='plotly_dark',
+        showlegend=False,  # Hide legend - lap info shown above in UI
+        margin=dict(l=60, r=20, t=20, b=60)  # Reduced top margin since no titles/legend
+    )
+
+    # Convert to JSON for client-side rendering (orjson handles numpy arrays natively).
+    # Traces were already validated as they were built, so skip re-validating.
+    chart_json = fig.to_json(engine='orjson', validate=False)
+
+    return {
+        'success': True,
+        'chart_json': chart_json,
+        'lap_count': len(lap_data),
+        'subplot_count': len(subplots)
+    }, 200
+
+
 @login_required
-def api_generate_chart(request):
+async def api_generate_chart(request):
     """
     API endpoint to generate dynamic telemetry charts based on selected laps and channels.
 
@@ -216,276 +637,29 @@ def api_generate_chart(request):
         if not selected_channels:
             return JsonResponse({'error': 'No channels selected'}, status=400)
 
-        # Fetch laps
-        laps = []
-        for lap_id in lap_ids:
-            lap = Lap.objects.filter(id=lap_id).select_related(
-                'session', 'session__driver', 'session__track', 'session__car', 'telemetry'
-            ).first()
-
-            if not lap:
-                continue
-
-            # Check permissions - allow if user owns session or shares a team with driver
-            if lap.session.driver != request.user:
-                user_team_ids = set(Team.objects.filter(members=request.user).values_list('id', flat=True))
-                driver_team_ids = set(Team.objects.filter(members=lap.session.driver).values_list('id', flat=True))
-                if not (user_team_ids & driver_team_ids):
-                    continue
-
-            laps.append(lap)
+        user = await request.auser()
+        laps = await sync_to_async(_get_chart_laps)(user, lap_ids)
 
         if not laps:
             return JsonResponse({'error': 'No valid laps found'}, status=404)
 
-        # Color palette (hot to cold: Red, Orange, Yellow, Green, Blue)
-        default_colors = ['#FF0000', '#FF8C00', '#FFD700', '#00FF00', '#00BFFF']
-
-        # Extract telemetry data
-        lap_data = []
-        for i, lap in enumerate(laps):
-            telemetry = lap.telemetry
-            if telemetry and telemetry.data:
-                # Use client-provided color if available, otherwise use default palette
-                if lap_colors and i < len(lap_colors):
-                    color = lap_colors[i]
-                else:
-                    color = default_colors[i % len(default_colors)]
-
-                lap_data.append({
-                    'lap': lap,
-                    'data': telemetry.data,
-                    'color': color,
-                    'name': f"{lap.session.driver.username} - {lap.lap_time:.3f}s"
-                })
-
-        if not lap_data:
-            return JsonResponse({'error': 'No telemetry data available'}, status=404)
-
-        # Group channels by subplot
-        channel_groups = {
-            'delta': ['LapDist', 'SessionTime'],  # For time delta calculation
-            'Speed': ['Speed', 'LapDist'],
-            'Throttle': ['Throttle', 'LapDist'],
-            'Brake': ['Brake', 'LapDist'],
-            'Clutch': ['Clutch', 'LapDist'],
-            'Gear': ['Gear', 'LapDist'],
-            'RPM': ['RPM', 'LapDist'],
-            'SteeringWheelAngle': ['SteeringWheelAngle', 'LapDist'],
-            # Tire Temperatures
-            'LFtempL': ['LFtempL', 'LapDist'],
-            'LFtempM': ['LFtempM', 'LapDist'],
-            'LFtempR': ['LFtempR', 'LapDist'],
-            'RFtempL': ['RFtempL', 'LapDist'],
-            'RFtempM': ['RFtempM', 'LapDist'],
-            'RFtempR': ['RFtempR', 'LapDist'],
-            'LRtempL': ['LRtempL', 'LapDist'],
-            'LRtempM': ['LRtempM', 'LapDist'],
-            'LRtempR': ['LRtempR', 'LapDist'],
-            'RRtempL': ['RRtempL', 'LapDist'],
-            'RRtempM': ['RRtempM', 'LapDist'],
-            'RRtempR': ['RRtempR', 'LapDist'],
-            # Tire Pressures
-            'LFcoldPressure': ['LFcoldPressure', 'LapDist'],
-            'RFcoldPressure': ['RFcoldPressure', 'LapDist'],
-            'LRcoldPressure': ['LRcoldPressure', 'LapDist'],
-            'RRcoldPressure': ['RRcoldPressure', 'LapDist'],
-            # Suspension - Ride Heights
-            'LFrideHeight': ['LFrideHeight', 'LapDist'],
-            'RFrideHeight': ['RFrideHeight', 'LapDist'],
-            'LRrideHeight': ['LRrideHeight', 'LapDist'],
-            'RRrideHeight': ['RRrideHeight', 'LapDist'],
-            # Suspension - Shock Deflection
-            'LFshockDefl': ['LFshockDefl', 'LapDist'],
-            'RFshockDefl': ['RFshockDefl', 'LapDist'],
-            'LRshockDefl': ['LRshockDefl', 'LapDist'],
-            'RRshockDefl': ['RRshockDefl', 'LapDist'],
-            # Suspension - Shock Velocity
-            'LFshockVel': ['LFshockVel', 'LapDist'],
-            'RFshockVel': ['RFshockVel', 'LapDist'],
-            'LRshockVel': ['LRshockVel', 'LapDist'],
-            'RRshockVel': ['RRshockVel', 'LapDist'],
-            # Acceleration / G-Forces
-            'LatAccel': ['LatAccel', 'LapDist'],
-            'LongAccel': ['LongAccel', 'LapDist'],
-            'VertAccel': ['VertAccel', 'LapDist'],
-            # Orientation
-            'Roll': ['Roll', 'LapDist'],
-            'Pitch': ['Pitch', 'LapDist'],
-            'Yaw': ['Yaw', 'LapDist'],
-            'RollRate': ['RollRate', 'LapDist'],
-            'PitchRate': ['PitchRate', 'LapDist'],
-            'YawRate': ['YawRate', 'LapDist'],
-            # Fuel
-            'FuelLevel': ['FuelLevel', 'LapDist'],
-            'FuelLevelPct': ['FuelLevelPct', 'LapDist'],
-        }
-
-        # Determine subplots to create
-        subplots = []
-        subplot_titles = []
-
-        # Always include delta if comparing multiple laps
-        if len(lap_data) > 1:
-            subplots.append('delta')
-            subplot_titles.append('Time Delta vs Fastest Lap')
-
-        # Add selected channels
-        for channel in selected_channels:
-            if channel in channel_groups:
-                # Check if first lap has this channel
-                if all(req in lap_data[0]['data'] for req in channel_groups[channel]):
-                    subplots.append(channel)
-                    # Format channel name for display
-                    display_name = channel.replace('Wheel', ' Wheel').replace('Accel', ' Accel')
-                    subplot_titles.append(display_name)
-
-        if not subplots:
-            return JsonResponse({'error': 'No valid channels to display'}, status=400)
-
-        # Create subplots (no titles to save space - lap info shown above in UI)
-        fig = make_subplots(
-            rows=len(subplots),
-            cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.02,
-            subplot_titles=[],  # Remove titles to save space
-            row_heights=[350] * len(subplots)
-        )
+        # Reuse a previously built chart for the same laps/channels/colors
+        cache_key = _chart_cache_key(laps, selected_channels, lap_colors)
+        cached_result = await cache.aget(cache_key)
+        if cached_result is not None:
+            return JsonResponse(cached_result)
 
-        # Sort laps by lap time for delta calculation
-        fastest_lap = min(lap_data, key=lambda x: x['lap'].lap_time)
-
-        # Add traces for each subplot
-        for row_idx, subplot_type in enumerate(subplots, start=1):
-            if subplot_type == 'delta' and len(lap_data) > 1:
-                # Calculate time delta for each lap vs fastest
-                for lap_info in lap_data:
-                    try:
-                        # Get distance and time arrays
-                        distance = np.array(lap_info['data'].get('LapDist', []))
-                        time = np.array(lap_info['data'].get('SessionTime', []))
-                        fastest_distance = np.array(fastest_lap['data'].get('LapDist', []))
-                        fastest_time = np.array(fastest_lap['data'].get('SessionTime', []))
-
-                        if len(distance) == 0 or len(fastest_distance) == 0:
-                            continue
-
-                        # Normalize time to start from 0 for each lap (relative lap time)
-                        time = time - time[0]
-                        fastest_time = fastest_time - fastest_time[0]
-
-                        # Interpolate to common distance points
-                        common_distance = np.linspace(0, min(distance.max(), fastest_distance.max()), 500)
-                        interp_time = np.interp(common_distance, distance, time)
-                        interp_fastest_time = np.interp(common_distance, fastest_distance, fastest_time)
-
-                        # Calculate delta (positive = slower, negative = faster)
-                        delta = interp_time - interp_fastest_time
-
-                        # Choose line style based on whether this is the fastest lap
-                        line_style = dict(color=lap_info['color'], width=1)
-                        if lap_info == fastest_lap:
-                            # Fastest lap shows as baseline (delta = 0)
-                            line_style['dash'] = 'dot'
-
-                        fig.add_trace(
-                            go.Scatter(
-                                x=common_distance,
-                                y=delta,
-                                name=lap_info['name'],
-                                line=line_style,
-                                hovertemplate='Distance: %{x:.1f}m<br>Delta: %{y:+.3f}s<extra></extra>'
-                            ),
-                            row=row_idx,
-                            col=1
-                        )
-                    except (ValueError, IndexError) as e:
-                        logger.warning("Error calculating delta: %s", e)
-
-                # Update y-axis for delta
-                fig.update_yaxes(title_text="Time Delta (s)", row=row_idx, col=1)
+        await sync_to_async(_load_chart_telemetry)(laps)
 
-            else:
-                # Regular channel subplot
-                required_channels = channel_groups.get(subplot_type, [])
-
-                for lap_info in lap_data:
-                    try:
-                        # Check if lap has required channels
-                        if not all(ch in lap_info['data'] for ch in required_channels):
-                            continue
-
-                        x_data = lap_info['data'].get('LapDist', [])
-                        y_data = lap_info['data'].get(subplot_type, [])
-
-                        if len(x_data) == 0 or len(y_data) == 0:
-                            continue
-
-                        # Truncate to shortest length
-                        min_len = min(len(x_data), len(y_data))
-                        x_data = x_data[:min_len]
-                        y_data = y_data[:min_len]
-
-                        # Convert units for better readability
-                        if subplot_type == 'Speed':
-                            # Convert Speed from m/s to km/h
-                            y_data = [v * 3.6 for v in y_data]
-                        elif subplot_type in ['Throttle', 'Brake', 'Clutch']:
-                            # Convert from 0-1 to 0-100%
-                            y_data = [v * 100 for v in y_data]
-                        elif subplot_type == 'Gear':
-                            # Filter out gear 0 (neutral) for cleaner display
-                            y_data = [v if v > 0 else None for v in y_data]
-
-                        fig.add_trace(
-                            go.Scatter(
-                                x=x_data,
-                                y=y_data,
-                                name=lap_info['name'],
-                                line=dict(color=lap_info['color'], width=1),
-                                hovertemplate=f'Distance: %{{x:.1f}}m<br>{subplot_type}: %{{y:.2f}}<extra></extra>',
-                                connectgaps=True  # Connect line segments even with None values (for Gear)
-                            ),
-                            row=row_idx,
-                            col=1
-                        )
-                    except (KeyError, TypeError) as e:
-                        logger.warning("Error adding trace for %s: %s", subplot_type, e)
-
-                # Update y-axis label with proper units
-                y_label = subplot_type
-                if subplot_type == 'Speed':
-                    y_label = 'Speed (km/h)'
-                elif subplot_type in ['Throttle', 'Brake', 'Clutch']:
-                    y_label = f'{subplot_type} (%)'
-                    # Set fixed range for percentage inputs (0-100%)
-                    fig.update_yaxes(title_text=y_label, range=[0, 100], row=row_idx, col=1)
-                    continue  # Skip the default update below
-
-                fig.update_yaxes(title_text=y_label, row=row_idx, col=1)
-
-        # Update x-axis (only bottom subplot)
-        fig.update_xaxes(title_text="Distance (m)", row=len(subplots), col=1)
-
-        # Update layout
-        fig.update_layout(
-            height=350 * len(subplots),
-            hovermode='x unified',
-            template='plotly_dark',
-            showlegend=False,  # Hide legend - lap info shown above in UI
-            margin=dict(l=60, r=20, t=20, b=60)  # Reduced top margin since no titles/legend
+        # Build the figure in a worker thread: under ASGI, sync code otherwise
+        # shares one thread, so a large chart would stall every other request
+        result, status = await sync_to_async(_build_chart, thread_sensitive=False)(
+            laps, selected_channels, lap_colors
         )
+        if status == 200:
+            await cache.aset(cache_key, result, CHART_CACHE_TIMEOUT)
 
-        # Convert to JSON for client-side rendering
-        chart_json = fig.to_json()
-
-        return JsonResponse({
-            'success': True,
-            'chart_json': chart_json,
-            'lap_count': len(lap_data),
-            'subplot_count': len(subplots)
-        })
+        return JsonResponse(result, status=status)
 
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
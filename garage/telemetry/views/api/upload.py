@@ -6,18 +6,23 @@ import gzip
 import hashlib
 import logging
 import zlib
-from io import BytesIO
 
 from django.conf import settings
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
 from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.csrf import csrf_exempt
 
 from ...models import Session
+from ...tasks import parse_ibt_file
 from .auth import api_token_required
 
 logger = logging.getLogger(__name__)
 
+# Read size used when stream-decompressing gzipped uploads
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+
 
 @csrf_exempt
 @api_token_required
@@ -39,6 +44,24 @@ def api_upload(request):
             'error': 'Only POST method is allowed'
         }, status=405)
 
+    # Reject oversize requests from the header before parsing the multipart
+    # body. Under ASGI the body has already been received and spooled to a
+    # temp file by now; only nginx's client_max_body_size stops it earlier.
+    max_size = getattr(settings, 'MAX_UPLOAD_SIZE', 2147483648)  # 2GB default
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > max_size:
+        return JsonResponse({
+            'error': f'File size exceeds maximum allowed size ({max_size / (1024**3):.1f} GB)'
+        }, status=413)
+
+    # Spool the upload straight to a temp file (never into memory, whatever
+    # its size); FileSystemStorage then moves that file into place on save
+    # instead of copying it chunk by chunk. Must be set before request.FILES.
+    request.upload_handlers = [TemporaryFileUploadHandler(request)]
+
     # Check if file was uploaded
     if 'file' not in request.FILES:
         return JsonResponse({
@@ -58,37 +81,50 @@ def api_upload(request):
     uploaded_file.seek(0)  # Reset to beginning
 
     if file_start == b'\x1f\x8b':  # Gzip magic number
+        # Stream-decompress into a temp file so the decompressed .ibt is never
+        # held in memory; it is then moved into place on save like any upload
+        decompressed_file = TemporaryUploadedFile(
+            name=uploaded_file.name.replace('.gz', ''),  # Remove .gz extension if present
+            content_type='application/octet-stream',
+            size=0,
+            charset=None
+        )
         try:
-            # Read and decompress the entire file
-            compressed_data = uploaded_file.read()
-            decompressed_data = gzip.decompress(compressed_data)
-
-            # Create new in-memory file with decompressed data
-            decompressed_file = InMemoryUploadedFile(
-                file=BytesIO(decompressed_data),
-                field_name='file',
-                name=uploaded_file.name.replace('.gz', ''),  # Remove .gz extension if present
-                content_type='application/octet-stream',
-                size=len(decompressed_data),
-                charset=None
-            )
-            uploaded_file = decompressed_file
-
+            # Count bytes as they are written and stop as soon as the output
+            # passes max_size, so a small gzip bomb can't fill the temp dir
+            with gzip.GzipFile(fileobj=uploaded_file.file, mode='rb') as gz:
+                written = 0
+                while chunk := gz.read(DECOMPRESS_CHUNK_SIZE):
+                    written += len(chunk)
+                    if written > max_size:
+                        decompressed_file.close()
+                        return JsonResponse({
+                            'error': f'File size exceeds maximum allowed size ({max_size / (1024**3):.1f} GB)'
+                        }, status=413)
+                    decompressed_file.file.write(chunk)
         except gzip.BadGzipFile:
+            decompressed_file.close()
             return JsonResponse({
                 'error': 'File appears corrupted - invalid gzip format'
             }, status=400)
-        except (OSError, IOError, zlib.error) as e:
+        except (OSError, IOError, EOFError, zlib.error) as e:
+            decompressed_file.close()
             return JsonResponse({
                 'error': f'Decompression error: {str(e)}'
             }, status=400)
 
-    # Validate file size (check against MAX_UPLOAD_SIZE from settings)
-    max_size = getattr(settings, 'MAX_UPLOAD_SIZE', 2147483648)  # 2GB default
+        decompressed_file.size = decompressed_file.file.tell()
+        decompressed_file.seek(0)
+        # Register it with the request so it is closed (and its temp file
+        # removed, if not moved into storage) along with the original upload
+        request.FILES.appendlist('file', decompressed_file)
+        uploaded_file = decompressed_file
+
+    # Validate file size (gzipped uploads were already capped while decompressing)
     if uploaded_file.size > max_size:
         return JsonResponse({
             'error': f'File size exceeds maximum allowed size ({max_size / (1024**3):.1f} GB)'
-        }, status=400)
+        }, status=413)
 
     # Validate minimum file size (IBT files are typically > 1KB)
     if uploaded_file.size < 1024:
@@ -96,19 +132,17 @@ def api_upload(request):
             'error': 'File appears to be too small to be a valid IBT file'
         }, status=400)
 
-    # Calculate file hash for duplicate detection
+    # Calculate file hash for duplicate detection (of the decompressed .ibt,
+    # matching what backfill_file_hashes computes for stored files)
     uploaded_file.seek(0)  # Reset file pointer to beginning
-    hash_obj = hashlib.sha256()
-    for chunk in uploaded_file.chunks():
-        hash_obj.update(chunk)
-    file_hash = hash_obj.hexdigest()
+    file_hash = hashlib.file_digest(uploaded_file.file, 'sha256').hexdigest()
     uploaded_file.seek(0)  # Reset for saving
 
     # Check for duplicate session
     existing_session = Session.objects.filter(
         driver=request.user,
         file_hash=file_hash
-    ).first()
+    ).only('id').first()
 
     if existing_session:
         logger.info(f"Duplicate upload detected: {uploaded_file.name} (session {existing_session.id})")
@@ -131,7 +165,6 @@ def api_upload(request):
     # Try to extract original file modification time from header
     original_mtime = request.META.get('HTTP_X_ORIGINAL_MTIME')
     if original_mtime:
-        from django.utils.dateparse import parse_datetime
         parsed_mtime = parse_datetime(original_mtime)
         if parsed_mtime:
             session.session_date = parsed_mtime
@@ -139,7 +172,6 @@ def api_upload(request):
     session.save()
 
     # Queue Celery task for processing
-    from ...tasks import parse_ibt_file
     parse_ibt_file.delay(session.id)
 
     return JsonResponse({
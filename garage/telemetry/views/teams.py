@@ -4,15 +4,50 @@ Team management views for Ridgway Garage.
 Handles team CRUD operations, membership management, and team detail views.
 """
 
+from functools import wraps
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Q
 
+from ..forms import TeamForm, JoinRequestForm, TeamInviteForm
 from ..models import Team, JoinRequest, TeamInvitation, TeamMembership
 
+User = get_user_model()
+
+
+def require_team_admin(action):
+    """
+    Decorator for team views restricted to owners and admins.
+
+    Loads the team and checks the user's role with a single membership
+    lookup, redirecting anyone else to the team page with an error naming
+    the action. The view receives the team instead of its pk.
+
+    Usage:
+        @login_required
+        @require_team_admin("manage invitations")
+        def my_team_view(request, team):
+            ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, pk, *args, **kwargs):
+            team = get_object_or_404(Team, pk=pk)
+
+            if team.get_user_role(request.user) not in ('owner', 'admin'):
+                messages.error(request, f"Only team owners and admins can {action}.")
+                return redirect('telemetry:team_detail', pk=pk)
+
+            return view_func(request, team, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 @login_required
 def team_list(request):
@@ -22,28 +57,33 @@ def team_list(request):
     # Get search query
     search_query = request.GET.get('search', '').strip()
 
-    # Teams the user is a member of
-    user_teams = Team.objects.filter(members=request.user).prefetch_related('members')
+    # Teams the user is a member of. Selected through a subquery so that
+    # member_count counts every member, not just the join filtered to the user.
+    user_teams = Team.objects.filter(
+        pk__in=TeamMembership.objects.filter(user=request.user).values('team_id')
+    ).annotate(member_count=Count('members'))
 
     if search_query:
         user_teams = user_teams.filter(name__icontains=search_query)
 
     # Teams that allow join requests (not a member of)
-    public_teams = Team.objects.filter(allow_join_requests=True).exclude(members=request.user)
+    public_teams = Team.objects.filter(
+        allow_join_requests=True
+    ).exclude(members=request.user).annotate(member_count=Count('members'))
 
     if search_query:
         public_teams = public_teams.filter(name__icontains=search_query)
 
-    # Get user's pending join requests
-    pending_requests = JoinRequest.objects.filter(
-        user=request.user,
+    # Get user's pending join requests (team ids, for "in" checks in the template)
+    pending_requests = frozenset(JoinRequest.objects.filter(
+        user_id=request.user.pk,
         status='pending'
-    ).values_list('team_id', flat=True)
+    ).values_list('team_id', flat=True))
 
     context = {
         'user_teams': user_teams,
         'public_teams': public_teams,
-        'pending_requests': list(pending_requests),
+        'pending_requests': pending_requests,
         'search_query': search_query,
     }
 
@@ -55,8 +95,6 @@ def team_create(request):
     """
     Create a new team.
     """
-    from ..forms import TeamForm
-
     if request.method == 'POST':
         form = TeamForm(request.POST)
         if form.is_valid():
@@ -65,15 +103,16 @@ def team_create(request):
             # Only superusers can set is_default_team
             if not request.user.is_superuser:
                 team.is_default_team = False
-            team.save()
 
-            # Add creator as team member with owner role
-            from ..models import TeamMembership
-            TeamMembership.objects.create(
-                team=team,
-                user=request.user,
-                role='owner'
-            )
+            # Save the team and its owner membership together, so a failed
+            # membership insert can't leave a team nobody can manage
+            with transaction.atomic():
+                team.save()
+                TeamMembership.objects.create(
+                    team=team,
+                    user=request.user,
+                    role='owner'
+                )
 
             messages.success(request, f'Team "{team.name}" created successfully!')
             return redirect('telemetry:team_detail', pk=team.pk)
@@ -93,25 +132,21 @@ def team_detail(request, pk):
     """
     View team details and members.
     """
-    team = get_object_or_404(Team.objects.prefetch_related('members'), pk=pk)
-
-    # Check if user is a member
-    is_member = request.user in team.members.all()
-
-    # Get user's role if they're a member
-    user_role = None
-    if is_member:
-        try:
-            membership = team.teammembership_set.get(user=request.user)
-            user_role = membership.role
-        except TeamMembership.DoesNotExist:
-            pass
+    # The page shows the owner's username
+    team = get_object_or_404(Team.objects.select_related('owner'), pk=pk)
 
     # Get team members with roles
-    memberships = team.teammembership_set.select_related('user').order_by('role', 'joined_at')
+    memberships = list(team.teammembership_set.select_related('user').order_by('role', 'joined_at'))
+
+    # Get user's role (None if not a member) from the member list already loaded
+    user_membership = next((m for m in memberships if m.user_id == request.user.id), None)
+    user_role = user_membership.role if user_membership else None
+    is_member = user_role is not None
 
-    # Check if user has a pending join request
-    has_pending_request = team.has_pending_request(request.user)
+    # Check if user has a pending join request (only shown to non-members)
+    has_pending_request = not is_member and JoinRequest.objects.filter(
+        team_id=team.pk, user_id=request.user.pk, status='pending'
+    ).exists()
 
     context = {
         'team': team,
@@ -130,12 +165,10 @@ def team_edit(request, pk):
     """
     Edit team settings (owner only).
     """
-    from ..forms import TeamForm
-
     team = get_object_or_404(Team, pk=pk)
 
-    # Check if user is the owner
-    if team.owner != request.user:
+    # Check if user is the owner (compare ids; no need to load the owner row)
+    if team.owner_id != request.user.pk:
         messages.error(request, "Only the team owner can edit team settings.")
         return redirect('telemetry:team_detail', pk=pk)
 
@@ -166,7 +199,7 @@ def team_delete(request, pk):
     """
     Delete a team (owner only).
     """
-    team = get_object_or_404(Team, pk=pk, owner=request.user)
+    team = get_object_or_404(Team.objects.only('id', 'name', 'owner'), pk=pk, owner=request.user)
     team_name = team.name
     team.delete()
 
@@ -183,20 +216,19 @@ def team_request_join(request, pk):
     """
     team = get_object_or_404(Team, pk=pk)
 
-    # Validate user can request to join
-    if not team.can_user_request_join(request.user):
-        if team.is_user_member(request.user):
-            messages.info(request, "You are already a member of this team.")
-        elif not team.allow_join_requests:
-            messages.error(request, "This team is not accepting join requests.")
-        elif team.has_pending_request(request.user):
-            messages.info(request, "You already have a pending request for this team.")
-        else:
-            messages.error(request, "You cannot request to join this team.")
+    # Validate user can request to join (the Team.can_user_request_join checks,
+    # made once here so the refusal message doesn't repeat them)
+    if team.get_user_role(request.user) is not None:
+        messages.info(request, "You are already a member of this team.")
+        return redirect('telemetry:team_detail', pk=pk)
+    if not team.allow_join_requests:
+        messages.error(request, "This team is not accepting join requests.")
+        return redirect('telemetry:team_detail', pk=pk)
+    if team.has_pending_request(request.user):
+        messages.info(request, "You already have a pending request for this team.")
         return redirect('telemetry:team_detail', pk=pk)
 
     if request.method == 'POST':
-        from ..forms import JoinRequestForm
         form = JoinRequestForm(request.POST)
         if form.is_valid():
             join_request = form.save(commit=False)
@@ -207,7 +239,6 @@ def team_request_join(request, pk):
             messages.success(request, f'Your request to join "{team.name}" has been submitted!')
             return redirect('telemetry:team_detail', pk=pk)
     else:
-        from ..forms import JoinRequestForm
         form = JoinRequestForm()
 
     context = {
@@ -226,31 +257,37 @@ def team_cancel_request(request, pk):
     """
     team = get_object_or_404(Team, pk=pk)
 
-    try:
-        join_request = JoinRequest.objects.get(team=team, user=request.user, status='pending')
-        join_request.delete()
+    # Single DELETE; the row count tells us whether there was anything to cancel
+    deleted, _ = JoinRequest.objects.filter(team=team, user=request.user, status='pending').delete()
+    if deleted:
         messages.success(request, f'Your join request for "{team.name}" has been cancelled.')
-    except JoinRequest.DoesNotExist:
+    else:
         messages.error(request, "No pending join request found.")
 
     return redirect('telemetry:team_detail', pk=pk)
 
 
 @login_required
-def team_manage_requests(request, pk):
+@require_team_admin("manage join requests")
+def team_manage_requests(request, team):
     """
     View and manage pending join requests (owner/admin only).
     """
-    team = get_object_or_404(Team, pk=pk)
-
-    # Check if user has admin privileges
-    if not team.is_user_admin(request.user):
-        messages.error(request, "Only team owners and admins can manage join requests.")
-        return redirect('telemetry:team_detail', pk=pk)
-
     # Get all requests (pending first, then recent approved/rejected)
-    pending_requests = team.join_requests.filter(status='pending').select_related('user')
-    recent_requests = team.join_requests.filter(status__in=['approved', 'rejected']).select_related('user', 'reviewed_by').order_by('-reviewed_at')[:20]
+    # Only the columns the page shows (names, message, status, timestamps)
+    pending_requests = team.join_requests.filter(status='pending').select_related(
+        'user__driver_profile'
+    ).only(
+        'id', 'team', 'message', 'created_at',
+        'user__username', 'user__driver_profile__display_name',
+    )
+    recent_requests = team.join_requests.filter(status__in=['approved', 'rejected']).select_related(
+        'user__driver_profile', 'reviewed_by__driver_profile'
+    ).only(
+        'id', 'team', 'status', 'reviewed_at',
+        'user__username', 'user__driver_profile__display_name',
+        'reviewed_by__username', 'reviewed_by__driver_profile__display_name',
+    ).order_by('-reviewed_at')[:20]
 
     context = {
         'team': team,
@@ -263,17 +300,11 @@ def team_manage_requests(request, pk):
 
 @login_required
 @require_POST
-def team_approve_request(request, pk, request_id):
+@require_team_admin("approve join requests")
+def team_approve_request(request, team, request_id):
     """
     Approve a join request (owner/admin only).
     """
-    team = get_object_or_404(Team, pk=pk)
-
-    # Check if user has admin privileges
-    if not team.is_user_admin(request.user):
-        messages.error(request, "Only team owners and admins can approve join requests.")
-        return redirect('telemetry:team_detail', pk=pk)
-
     join_request = get_object_or_404(JoinRequest, pk=request_id, team=team, status='pending')
 
     try:
@@ -282,22 +313,16 @@ def team_approve_request(request, pk, request_id):
     except Exception as e:
         messages.error(request, f'Error approving request: {str(e)}')
 
-    return redirect('telemetry:team_manage_requests', pk=pk)
+    return redirect('telemetry:team_manage_requests', pk=team.pk)
 
 
 @login_required
 @require_POST
-def team_reject_request(request, pk, request_id):
+@require_team_admin("reject join requests")
+def team_reject_request(request, team, request_id):
     """
     Reject a join request (owner/admin only).
     """
-    team = get_object_or_404(Team, pk=pk)
-
-    # Check if user has admin privileges
-    if not team.is_user_admin(request.user):
-        messages.error(request, "Only team owners and admins can reject join requests.")
-        return redirect('telemetry:team_detail', pk=pk)
-
     join_request = get_object_or_404(JoinRequest, pk=request_id, team=team, status='pending')
 
     try:
@@ -306,49 +331,39 @@ def team_reject_request(request, pk, request_id):
     except Exception as e:
         messages.error(request, f'Error rejecting request: {str(e)}')
 
-    return redirect('telemetry:team_manage_requests', pk=pk)
+    return redirect('telemetry:team_manage_requests', pk=team.pk)
 
 
 # ===== Team Invitation Views =====
 
 @login_required
-def team_invite_user(request, pk):
+@require_team_admin("invite users")
+def team_invite_user(request, team):
     """
     Invite a user to join the team (owner/admin only).
     """
-    team = get_object_or_404(Team, pk=pk)
-
-    # Check if user has admin privileges
-    if not team.is_user_admin(request.user):
-        messages.error(request, "Only team owners and admins can invite users.")
-        return redirect('telemetry:team_detail', pk=pk)
-
     if request.method == 'POST':
-        from ..forms import TeamInviteForm
         form = TeamInviteForm(request.POST)
         if form.is_valid():
             invitation = form.save(commit=False)
             invitation.team = team
             invitation.invited_by = request.user
 
-            # Check if email belongs to existing user
-            from django.contrib.auth.models import User
-            try:
-                invited_user = User.objects.get(email=invitation.email)
+            # Check if email belongs to existing user (emails aren't unique,
+            # so take the first match rather than risk MultipleObjectsReturned)
+            invited_user = User.objects.filter(email=invitation.email).only('id', 'username').first()
+            if invited_user is not None:
                 invitation.invited_user = invited_user
 
                 # Check if user is already a member
                 if team.is_user_member(invited_user):
                     messages.error(request, f'{invited_user.username} is already a member of this team.')
-                    return redirect('telemetry:team_detail', pk=pk)
-            except User.DoesNotExist:
-                pass  # Email doesn't match existing user
+                    return redirect('telemetry:team_detail', pk=team.pk)
 
             invitation.save()
             messages.success(request, f'Invitation sent to {invitation.email}!')
-            return redirect('telemetry:team_manage_invites', pk=pk)
+            return redirect('telemetry:team_manage_invites', pk=team.pk)
     else:
-        from ..forms import TeamInviteForm
         form = TeamInviteForm()
 
     context = {
@@ -360,17 +375,11 @@ def team_invite_user(request, pk):
 
 
 @login_required
-def team_manage_invites(request, pk):
+@require_team_admin("manage invitations")
+def team_manage_invites(request, team):
     """
     View and manage team invitations (owner/admin only).
     """
-    team = get_object_or_404(Team, pk=pk)
-
-    # Check if user has admin privileges
-    if not team.is_user_admin(request.user):
-        messages.error(request, "Only team owners and admins can manage invitations.")
-        return redirect('telemetry:team_detail', pk=pk)
-
     # Get all invitations
     pending_invites = team.invitations.filter(status='pending').select_related('invited_by', 'invited_user')
     recent_invites = team.invitations.filter(status__in=['accepted', 'declined', 'expired']).select_related('invited_by', 'invited_user').order_by('-created_at')[:20]
@@ -5,22 +5,35 @@ Views for the Ridgway Garage telemetry app.
 import logging
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from django.views.decorators.http import require_POST
-from django.db.models import Count
-
-from .models import Session, Lap, TelemetryData, Track, Car, Team
-from .forms import SessionUploadForm
+from django.db.models import Count, F, Min, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Driver, Session, Lap, TelemetryData, Team
+from .forms import CustomPasswordChangeForm, SessionUploadForm, UserSettingsForm
+from .tasks import parse_ibt_file, share_lap_to_discord
+# Helper functions from utils (now extracted)
+from .utils.export import (
+    aiter_compressed_lap_export_data,
+    build_lap_export_data,
+    import_lap_from_data,
+)
+from .utils.charts import (
+    create_lap_time_progression_chart,
+    create_laps_sparkline,
+    create_sessions_sparkline,
+)
+from .utils.filter_options import get_leaderboard_filter_options, get_user_filter_options
 
 logger = logging.getLogger(__name__)
 
 
-# Import helper functions from utils (now extracted)
-from .utils.export import build_lap_export_data, compress_lap_export_data, import_lap_from_data
-
-
 # ============================================================================
 # Views
 # ============================================================================
@@ -38,33 +51,56 @@ def home(request):
         # User stats
         user_sessions = Session.objects.filter(driver=request.user)
 
-        context['stats'] = {
-            'total_sessions': user_sessions.count(),
-            'total_laps': Lap.objects.filter(session__driver=request.user).count(),
-            'best_lap': Lap.objects.filter(
-                session__driver=request.user,
+        # One aggregate query per table instead of a separate COUNT/MIN each
+        session_stats = user_sessions.aggregate(
+            total=Count('id'),
+            processing=Count('id', filter=Q(processing_status='processing')),
+        )
+        user_laps = Lap.objects.filter(session__driver=request.user)
+        lap_stats = user_laps.aggregate(
+            total=Count('id'),
+            # Exclude laps with 0 or negative lap times
+            best_time=Min('lap_time', filter=Q(is_valid=True, lap_time__gt=0)),
+        )
+
+        best_lap = None
+        if lap_stats['best_time'] is not None:
+            best_lap = user_laps.filter(
                 is_valid=True,
-                lap_time__gt=0  # Exclude laps with 0 or negative lap times
-            ).select_related('session', 'session__track', 'session__car').order_by('lap_time').first(),
-            'processing': user_sessions.filter(processing_status='processing').count(),
+                lap_time=lap_stats['best_time']
+            ).select_related('session', 'session__track', 'session__car').first()
+
+        context['stats'] = {
+            'total_sessions': session_stats['total'],
+            'total_laps': lap_stats['total'],
+            'best_lap': best_lap,
+            'processing': session_stats['processing'],
         }
 
         # Generate sparkline charts for sessions and laps
-        from .utils.charts import create_sessions_sparkline, create_laps_sparkline
         context['sessions_sparkline'] = create_sessions_sparkline(request.user, weeks=12)
         context['laps_sparkline'] = create_laps_sparkline(request.user, weeks=12)
 
+        # Valid laps fastest-first, prefetched so best lap lookups don't query per session
+        valid_laps_sorted = Prefetch(
+            'laps',
+            queryset=Lap.objects.filter(is_valid=True, lap_time__gt=0).only(
+                'id', 'session_id', 'lap_number', 'lap_time'
+            ).order_by('lap_time'),
+            to_attr='valid_laps_sorted'
+        )
+
         # Recent sessions (last 5) - exclude sessions with 0 laps
         recent_sessions = user_sessions.select_related(
             'track', 'car', 'team'
-        ).prefetch_related('laps').annotate(
+        ).prefetch_related(valid_laps_sorted).annotate(
             lap_count=Count('laps')
         ).filter(lap_count__gt=0).order_by('-session_date').distinct()[:10]  # Get more to filter
 
         # Add best lap for each session and filter out sessions with no valid laps
         sessions_with_valid_laps = []
         for session in recent_sessions:
-            session.best_lap = session.laps.filter(is_valid=True, lap_time__gt=0).order_by('lap_time').first()
+            session.best_lap = session.valid_laps_sorted[0] if session.valid_laps_sorted else None
             if session.best_lap:  # Only include sessions that have at least one valid lap
                 sessions_with_valid_laps.append(session)
             if len(sessions_with_valid_laps) >= 5:  # Stop once we have 5 valid sessions
@@ -73,14 +109,13 @@ def home(request):
         context['recent_sessions'] = sessions_with_valid_laps
 
         # Get lap time progression data for chart (last 20 sessions with laps)
-        from .utils.charts import create_lap_time_progression_chart
-        sessions_with_laps = user_sessions.select_related('track', 'car').prefetch_related('laps').annotate(
+        sessions_with_laps = user_sessions.select_related('track', 'car').prefetch_related(valid_laps_sorted).annotate(
             lap_count=Count('laps')
         ).filter(lap_count__gt=0).order_by('-session_date')[:20]
 
         progression_data = []
         for session in sessions_with_laps:
-            best_lap = session.laps.filter(is_valid=True, lap_time__gt=0).order_by('lap_time').first()
+            best_lap = session.valid_laps_sorted[0] if session.valid_laps_sorted else None
             if best_lap:
                 progression_data.append({
                     'session_date': session.session_date,
@@ -128,13 +163,7 @@ def dashboard_analysis(request):
         return redirect('account_login')
 
     # Get list of tracks and cars user has driven (for dropdowns)
-    context['tracks'] = Track.objects.filter(
-        sessions__driver=request.user
-    ).distinct().order_by('name')
-
-    context['cars'] = Car.objects.filter(
-        sessions__driver=request.user
-    ).distinct().order_by('name')
+    context['tracks'], context['cars'] = get_user_filter_options(request.user)
 
     # Check if a specific lap was requested via query parameter
     lap_id = request.GET.get('lap')
@@ -158,21 +187,24 @@ def dashboard_analysis(request):
     elif session_id:
         logger.debug("Preloading top 5 fastest laps from session ID: %s", session_id)
         try:
-            session = Session.objects.select_related('track', 'car').prefetch_related('laps').get(
+            session = Session.objects.select_related('track', 'car').get(
                 id=session_id,
                 driver=request.user
             )
-            # Get top 5 fastest valid laps from this session (ordered fastest to slowest)
-            valid_laps = session.laps.filter(is_valid=True, lap_time__gt=0).order_by('lap_time')[:5]
+            # Get top 5 fastest valid laps from this session (ordered fastest to slowest).
+            # Evaluated once - the list is reused for the emptiness check and the IDs.
+            valid_laps = list(
+                session.laps.filter(is_valid=True, lap_time__gt=0).order_by('lap_time')[:5]
+            )
 
-            if valid_laps.exists():
+            if valid_laps:
                 # Store lap IDs as comma-separated string for JavaScript
                 lap_ids = ','.join(str(lap.id) for lap in valid_laps)
                 context['preloaded_session_laps'] = lap_ids
                 context['selected_track'] = session.track
                 context['selected_car'] = session.car
                 logger.debug("Successfully preloaded %d laps from session %s",
-                            valid_laps.count(), session_id)
+                            len(valid_laps), session_id)
             else:
                 logger.debug("No valid laps found in session %s", session_id)
 
@@ -185,19 +217,22 @@ def dashboard_analysis(request):
         recent_sessions = Session.objects.filter(
             driver=request.user,
             processing_status='completed'
-        ).prefetch_related('laps').annotate(
+        ).select_related('track', 'car').prefetch_related(
+            Prefetch(
+                'laps',
+                queryset=Lap.objects.filter(is_valid=True, lap_time__gt=0).order_by('lap_time'),
+                to_attr='valid_laps_sorted'
+            )
+        ).annotate(
             lap_count=Count('laps')
         ).filter(lap_count__gt=0).order_by('-session_date')[:10]
 
         recent_session = None
         recent_best_lap = None
 
-        # Find first session with at least one valid lap
+        # Find first session with at least one valid lap (laps are prefetched fastest-first)
         for session in recent_sessions:
-            best_lap = session.laps.filter(
-                is_valid=True,
-                lap_time__gt=0
-            ).order_by('lap_time').first()
+            best_lap = session.valid_laps_sorted[0] if session.valid_laps_sorted else None
 
             if best_lap:
                 recent_session = session
@@ -327,13 +362,20 @@ def session_list(request):
     """
     List all sessions for the logged-in user (excluding sessions with 0 laps).
     """
-    from django.core.paginator import Paginator
-
     ITEMS_PER_PAGE = 25
 
     sessions = Session.objects.filter(
         driver=request.user
-    ).select_related('track', 'car', 'team').prefetch_related('laps').annotate(
+    ).select_related('track', 'car', 'team').prefetch_related(
+        Prefetch(
+            'laps',
+            # Only the columns the lap chips need (sector times etc. stay unloaded)
+            queryset=Lap.objects.filter(is_valid=True, lap_time__gt=0).only(
+                'id', 'session_id', 'lap_number', 'lap_time', 'is_valid'
+            ).order_by('lap_number'),
+            to_attr='valid_laps'
+        )
+    ).annotate(
         lap_count=Count('laps')
     ).filter(lap_count__gt=0).order_by('-session_date')
 
@@ -350,18 +392,16 @@ def session_list(request):
         sessions = sessions.filter(processing_status=status_filter)
 
     # Get filter options
-    tracks = Track.objects.filter(sessions__driver=request.user).distinct()
-    cars = Car.objects.filter(sessions__driver=request.user).distinct()
+    tracks, cars = get_user_filter_options(request.user)
 
     # Paginate
     paginator = Paginator(sessions, ITEMS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # Add best lap and valid laps for each session in current page
+    # Add best lap for each session in current page (valid_laps is prefetched, so no extra queries)
     for session in page_obj:
-        session.valid_laps = session.laps.filter(is_valid=True, lap_time__gt=0).order_by('lap_number')
-        session.best_lap = session.valid_laps.order_by('lap_time').first() if session.valid_laps else None
+        session.best_lap = min(session.valid_laps, key=lambda lap: lap.lap_time, default=None)
 
     context = {
         'sessions': page_obj,  # Now a Page object, not QuerySet
@@ -390,7 +430,6 @@ def upload(request):
             session.save()
 
             # Queue Celery task for processing
-            from .tasks import parse_ibt_file
             parse_ibt_file.delay(session.id)
 
             messages.success(
@@ -445,9 +484,10 @@ def lap_export(request, pk):
     """
     Export a lap as a compressed JSON file (.lap.gz).
     Includes lap data, session metadata, and full telemetry.
-    """
-    from django.http import HttpResponse
 
+    The gzip stream is generated incrementally while the response is sent;
+    it is an async iterator so Daphne streams it rather than buffering it.
+    """
     lap = get_object_or_404(
         Lap.objects.select_related(
             'session', 'session__track', 'session__car', 'session__driver', 'telemetry'
@@ -470,19 +510,18 @@ def lap_export(request, pk):
     # Build export data structure using helper function
     export_data = build_lap_export_data(lap, telemetry)
 
-    # Compress using helper function
-    compressed_data = compress_lap_export_data(export_data)
-
     # Generate filename
     track_name = (lap.session.track.name if lap.session.track else 'Unknown').replace(' ', '_')
     car_name = (lap.session.car.name if lap.session.car else 'Unknown').replace(' ', '_')
     lap_time_str = f"{lap.lap_time:.3f}".replace('.', '_')
     filename = f"{track_name}_{car_name}_{lap_time_str}.lap.gz"
 
-    # Create HTTP response
-    response = HttpResponse(compressed_data, content_type='application/gzip')
+    # Stream compressed chunks (no Content-Length, size is unknown up front)
+    response = StreamingHttpResponse(
+        aiter_compressed_lap_export_data(export_data),
+        content_type='application/gzip'
+    )
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    response['Content-Length'] = len(compressed_data)
 
     return response
 
@@ -496,15 +535,12 @@ def lap_share_to_discord(request, pk, team_id):
     """
     Share a lap to team's Discord channel via webhook.
     Uploads .lap.gz file and posts formatted message with import links.
-    """
-    import base64
-    import requests
-    from django.conf import settings
 
+    The export is compressed and posted by a Celery task so the request
+    doesn't wait on Discord.
+    """
     lap = get_object_or_404(
-        Lap.objects.select_related(
-            'session', 'session__track', 'session__car', 'session__driver', 'telemetry'
-        ),
+        Lap.objects.select_related('session'),
         pk=pk
     )
 
@@ -517,7 +553,7 @@ def lap_share_to_discord(request, pk, team_id):
     team = get_object_or_404(Team, pk=team_id)
 
     # Check if user is a member of this team
-    if request.user not in team.members.all():
+    if not team.is_user_member(request.user):
         messages.error(request, f"You are not a member of {team.name}.")
         return redirect('telemetry:lap_detail', pk=pk)
 
@@ -526,92 +562,18 @@ def lap_share_to_discord(request, pk, team_id):
         messages.error(request, f"{team.name} doesn't have a Discord webhook configured.")
         return redirect('telemetry:lap_detail', pk=pk)
 
-    # Get telemetry data
-    try:
-        telemetry = lap.telemetry
-    except TelemetryData.DoesNotExist:
+    # Check telemetry exists without loading the data blob
+    if not TelemetryData.objects.filter(lap=lap).exists():
         messages.error(request, "No telemetry data available for this lap.")
         return redirect('telemetry:lap_detail', pk=pk)
 
-    # Build export data using helper function
-    export_data = build_lap_export_data(lap, telemetry)
-
-    # Compress using helper function
-    compressed_data = compress_lap_export_data(export_data)
-
-    # Generate filename
-    track_name = (lap.session.track.name if lap.session.track else 'Unknown').replace(' ', '_')
-    car_name = (lap.session.car.name if lap.session.car else 'Unknown').replace(' ', '_')
-    lap_time_str = f"{lap.lap_time:.3f}".replace('.', '_')
-    filename = f"{track_name}_{car_name}_{lap_time_str}.lap.gz"
-
-    # Get driver display name from iRacing (not website username)
-    driver_name = lap.session.driver_name or lap.session.driver.username
-
-    # Format Discord message
-    track_display = lap.session.track.name if lap.session.track else 'Unknown Track'
-    if lap.session.track and lap.session.track.configuration:
-        track_display += f" - {lap.session.track.configuration}"
-
-    car_display = lap.session.car.name if lap.session.car else 'Unknown Car'
-    lap_status = "Valid" if lap.is_valid else "Invalid"
-    session_date = lap.session.session_date.strftime("%b %d, %Y %H:%M")
-
-    weather_info = ""
-    if lap.session.air_temp:
-        weather_info = f"\n**Weather:** {lap.session.weather_type or 'Clear'}, {lap.session.air_temp}°C"
-
     # Get optional notes from POST data
     notes = request.POST.get('notes', '').strip()
-    notes_section = ""
-    if notes:
-        notes_section = f"\n\n**Notes:**\n> {notes}\n"
-
-    # Format lap time as mm:ss.mmm
-    total_seconds = float(lap.lap_time)
-    minutes = int(total_seconds // 60)
-    seconds = total_seconds % 60
-    if minutes > 0:
-        formatted_time = f"{minutes}:{seconds:06.3f}"
-    else:
-        formatted_time = f"{seconds:.3f}s"
-
-    discord_message = f"""**New Lap Shared to Team**
-━━━━━━━━━━━━━━━━━━━━━
-**Driver:** {driver_name}
-**Track:** {track_display}
-**Car:** {car_display}
-**Time:** {formatted_time} ({lap_status})
-**Date:** {session_date}{weather_info}{notes_section}
-
-Download the .lap.gz attachment below to import
-"""
-
-    try:
-        # Post to Discord webhook
-        files = {
-            'file': (filename, compressed_data, 'application/gzip')
-        }
-        payload = {
-            'content': discord_message
-        }
 
-        response = requests.post(
-            team.discord_webhook_url,
-            data=payload,
-            files=files,
-            timeout=10
-        )
-
-        if response.status_code in [200, 204]:
-            messages.success(request, f'Lap shared to {team.name} Discord channel!')
-        else:
-            messages.error(request, f'Failed to share to Discord: {response.status_code} - {response.text}')
+    # Queue Celery task for compression and the webhook POST
+    share_lap_to_discord.delay(lap.id, team.id, notes)
 
-    except requests.exceptions.RequestException as e:
-        messages.error(request, f'Error connecting to Discord: {str(e)}')
-    except Exception as e:
-        messages.error(request, f'Error sharing lap: {str(e)}')
+    messages.info(request, f'Sharing lap to {team.name} Discord channel in the background.')
 
     return redirect('telemetry:lap_detail', pk=pk)
 
@@ -622,15 +584,16 @@ def user_settings(request):
     User profile and settings page.
     Handles profile settings, password changes, and API token management.
     """
-    from .models import Driver
-    from .forms import UserSettingsForm, CustomPasswordChangeForm
-
     # Get or create driver profile
     driver_profile, created = Driver.objects.get_or_create(
         user=request.user,
         defaults={'display_name': request.user.username}
     )
 
+    # Only the submitted form is bound; the others are built unbound below
+    settings_form = None
+    password_form = None
+
     # Determine which form was submitted based on the submit button name
     if request.method == 'POST':
         # Handle API token generation
@@ -646,9 +609,6 @@ def user_settings(request):
                 settings_form.save()
                 messages.success(request, 'Settings saved successfully!')
                 return redirect('telemetry:user_settings')
-            else:
-                # Re-instantiate other forms for display
-                password_form = CustomPasswordChangeForm(user=request.user)
 
         # Handle password change form
         elif 'change_password' in request.POST:
@@ -656,20 +616,14 @@ def user_settings(request):
             if password_form.is_valid():
                 password_form.save()
                 # Update session to prevent logout
-                from django.contrib.auth import update_session_auth_hash
                 update_session_auth_hash(request, password_form.user)
                 messages.success(request, 'Password changed successfully!')
                 return redirect('telemetry:user_settings')
-            else:
-                # Re-instantiate other forms for display
-                settings_form = UserSettingsForm(instance=driver_profile, user=request.user)
-        else:
-            # Unknown form submission, re-instantiate all forms
-            settings_form = UserSettingsForm(instance=driver_profile, user=request.user)
-            password_form = CustomPasswordChangeForm(user=request.user)
-    else:
-        # GET request - instantiate all forms
+
+    # Instantiate whichever forms weren't submitted (all of them on GET)
+    if settings_form is None:
         settings_form = UserSettingsForm(instance=driver_profile, user=request.user)
+    if password_form is None:
         password_form = CustomPasswordChangeForm(user=request.user)
 
     context = {
@@ -687,111 +641,83 @@ def leaderboards(request):
     Display global leaderboards showing best lap times for each track/car combination.
     Grouped and sortable with search functionality.
     """
-    from django.db.models import Min, Count, Q
-
     # Get filter parameters
     track_filter = request.GET.get('track', '')
     car_filter = request.GET.get('car', '')
     search = request.GET.get('search', '')
 
-    # Build base query for best laps per track/car/driver combination
-    # We want the fastest lap for each driver on each track/car combo
+    # Best lap for each driver on each track/car combo
     leaderboard_entries = []
 
     # Only show data if at least one filter (track or car) is selected
     if track_filter or car_filter:
-        # Get all track/car combinations that have laps
-        combinations = Lap.objects.filter(
+        best_laps = Lap.objects.filter(
             is_valid=True,
-            lap_time__gt=0  # Exclude laps with 0 or negative lap times
-        ).values('session__track', 'session__car').annotate(
-            lap_count=Count('id')
-        ).filter(lap_count__gt=0)
+            lap_time__gt=0,  # Exclude laps with 0 or negative lap times
+            session__track__isnull=False,
+            session__car__isnull=False,
+        )
 
         # Apply filters
         if track_filter:
-            combinations = combinations.filter(session__track__id=track_filter)
+            best_laps = best_laps.filter(session__track__id=track_filter)
         if car_filter:
-            combinations = combinations.filter(session__car__id=car_filter)
-
-        # For each combination, get the best lap for each driver
-        for combo in combinations:
-            track_id = combo['session__track']
-            car_id = combo['session__car']
-
-            if not track_id or not car_id:
-                continue
+            best_laps = best_laps.filter(session__car__id=car_filter)
+
+        # Apply search filter
+        if search:
+            best_laps = best_laps.filter(
+                Q(session__driver__username__icontains=search) |
+                Q(session__driver__driver_profile__display_name__icontains=search) |
+                Q(session__track__name__icontains=search) |
+                Q(session__car__name__icontains=search)
+            )
 
-            # Get best lap for each driver for this track/car combo
-            best_laps = Lap.objects.filter(
-                session__track_id=track_id,
-                session__car_id=car_id,
-                is_valid=True,
-                lap_time__gt=0  # Exclude laps with 0 or negative lap times
-            ).select_related(
-                'session__driver',
-                'session__track',
-                'session__car',
-                'session__team'
-            ).values(
-                'session__driver',
-                'session__driver__username',
-                'session__driver__driver_profile__display_name',
-                'session__track__name',
-                'session__track__configuration',
-                'session__car__name'
-            ).annotate(
-                best_time=Min('lap_time')
-            ).order_by('best_time')
-
-            # Apply search filter
-            if search:
-                best_laps = best_laps.filter(
-                    Q(session__driver__username__icontains=search) |
-                    Q(session__driver__driver_profile__display_name__icontains=search) |
-                    Q(session__track__name__icontains=search) |
-                    Q(session__car__name__icontains=search)
-                )
-
-            for lap_data in best_laps:
-                # Get the actual lap object for the link
-                actual_lap = Lap.objects.filter(
-                    session__driver_id=lap_data['session__driver'],
-                    session__track_id=track_id,
-                    session__car_id=car_id,
-                    lap_time=lap_data['best_time'],
-                    is_valid=True
-                ).select_related('session').first()
-
-                if actual_lap:
-                    track_name = lap_data['session__track__name']
-                    if lap_data['session__track__configuration']:
-                        track_name += f" - {lap_data['session__track__configuration']}"
-
-                    # Use display_name if available, fall back to username
-                    display_name = lap_data.get('session__driver__driver_profile__display_name')
-                    driver_name = display_name if display_name else lap_data['session__driver__username']
-
-                    leaderboard_entries.append({
-                        'driver': driver_name,
-                        'driver_id': lap_data['session__driver'],
-                        'track': track_name,
-                        'car': lap_data['session__car__name'],
-                        'lap_time': lap_data['best_time'],
-                        'lap': actual_lap,
-                    })
-
-    # Get unique tracks and cars for filters
-    tracks = Track.objects.filter(
-        id__in=Session.objects.filter(laps__isnull=False).values_list('track_id', flat=True).distinct()
-    ).order_by('name')
-
-    cars = Car.objects.filter(
-        id__in=Session.objects.filter(laps__isnull=False).values_list('car_id', flat=True).distinct()
-    ).order_by('name')
+        # Rank each driver's laps per track/car in one query and keep the fastest
+        best_laps = best_laps.annotate(
+            driver_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('session__track_id'), F('session__car_id'), F('session__driver_id')],
+                order_by=[F('lap_time').asc(), F('id').asc()],
+            )
+        ).filter(driver_rank=1).select_related(
+            'session__driver__driver_profile',
+            'session__track',
+            'session__car',
+        ).only(
+            # Just what the table renders; Track/Car/User rows are otherwise wide
+            'id', 'lap_time', 'session__id',
+            'session__driver__id', 'session__driver__username',
+            'session__driver__driver_profile__display_name',
+            'session__track__name', 'session__track__configuration',
+            'session__car__name',
+        ).order_by('session__track__name', 'session__track__configuration', 'session__car__name', 'lap_time')
+
+        for lap in best_laps:
+            track = lap.session.track
+            track_name = track.name
+            if track.configuration:
+                track_name += f" - {track.configuration}"
+
+            # Use display_name if available, fall back to username
+            driver = lap.session.driver
+            driver_profile = getattr(driver, 'driver_profile', None)
+            display_name = driver_profile.display_name if driver_profile else None
+            driver_name = display_name if display_name else driver.username
+
+            leaderboard_entries.append({
+                'driver': driver_name,
+                'driver_id': driver.id,
+                'track': track_name,
+                'car': lap.session.car.name,
+                'lap_time': lap.lap_time,
+                'lap': lap,
+            })
+
+    # Get unique tracks and cars for filters (cached, see utils.filter_options)
+    tracks, cars = get_leaderboard_filter_options()
 
     # Paginate leaderboard entries
-    from django.core.paginator import Paginator
     ITEMS_PER_PAGE = 25
 
     paginator = Paginator(leaderboard_entries, ITEMS_PER_PAGE)